@@ -2,9 +2,16 @@
 # enhanced_mcp_client.py - Enhanced Client with Safari URL Fix
 
 import asyncio
+import hashlib
+import io
 import json
+import logging
 import re
 import time
+from bisect import bisect_right
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import chain
 from typing import Optional, Tuple, Dict, Any, List
 import pathlib
 import sys
@@ -22,23 +29,724 @@ except ImportError:
     handle_write_files_batch = None
     infer_package_from_project = None
 
+# Raw JSON-RPC traffic is logged at DEBUG level (run_agent.py --debug) instead of always printed
+logger = logging.getLogger(__name__)
+
+# Fast JSON codec for the MCP round-trip: orjson when installed, stdlib json otherwise.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the same error.
+# _json_dumpline produces one newline-terminated message for the server's stdin (orjson appends
+# the newline while serializing, so no second bytes copy); _json_loads accepts str or bytes.
+try:
+    import orjson
+
+    def _json_dumpline(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+
+    def _json_dumpline(obj) -> bytes:
+        return (json.dumps(obj) + "\n").encode("utf-8")
+
+    _json_loads = json.loads
+
+# Page-source content hash: xxHash3 (SIMD, ~30 GB/s) when installed, 64-bit BLAKE2b otherwise.
+# Both are stable across processes (unlike the PYTHONHASHSEED-randomized builtin hash), so a
+# fingerprint can be stored and compared later - as long as the same hash library is installed.
+try:
+    import xxhash
+
+    def _source_hash(source: str) -> int:
+        # xxhash 4 only hashes bytes-like input
+        return xxhash.xxh3_64_intdigest(source.encode("utf-8", "surrogatepass"))
+except ImportError:
+    xxhash = None
+
+    def _source_hash(source: str) -> int:
+        return int.from_bytes(hashlib.blake2b(source.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+# Multi-keyword target classification: one Aho-Corasick pass when pyahocorasick is installed
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Page-source parser: lxml's libxml2 pull parser when installed (see requirements.txt), stdlib otherwise.
+# lxml.etree.ParseError is the base of XMLSyntaxError, so both parsers are caught as ET.ParseError.
+try:
+    from lxml import etree as ET
+    from lxml import html as lxml_html
+    ITERPARSE_OPTIONS = {"huge_tree": True}  # deep iOS/Safari hierarchies exceed libxml2's default limits
+except ImportError:
+    import xml.etree.ElementTree as ET
+    lxml_html = None
+    ITERPARSE_OPTIONS = {}
+
+# StreamReader line limit for server responses; full page-source results easily exceed asyncio's 64 KiB default
+MCP_STREAM_LIMIT = 64 * 1024 * 1024
+
+# Most recent found elements kept in EnhancedMCPClient.element_store (oldest are evicted first)
+ELEMENT_STORE_LIMIT = 256
+
+# How long a fetched page source is reused by internal lookups (seconds), and the tools
+# that cannot change the screen - any other tool call drops the cached source
+PAGE_SOURCE_TTL = 0.5
+READ_ONLY_TOOLS = frozenset({
+    "appium_get_page_source", "appium_find_element", "appium_get_text",
+    "appium_get_contexts", "appium_take_screenshot", "extract_selectors_from_page_source"
+})
+
+# How long a (strategy, value) -> element id hit is reused without asking Appium again (seconds).
+# The index is also dropped whenever a tool outside READ_ONLY_TOOLS runs (see call_tool).
+LOCATOR_CACHE_TTL = 5.0
+
+# XCUITest settings applied once per iOS session to shrink every page source Appium serializes.
+# "visible" is the most expensive attribute to compute and nothing here reads it; the attributes
+# the element extraction uses (name, label, value, accessible, enabled, ...) are kept.
+IOS_PAGE_SOURCE_SETTINGS = {"pageSourceExcludedAttributes": "visible"}
+
+# Reverse-DNS prefixes that mark an app identifier as a bundle ID / package name
+BUNDLE_ID_PREFIXES = ("com.", "org.", "io.")
+
+# Optional start_session fields, mapped once to the snake_case names your server expects
+OPTIONAL_SESSION_FIELDS = {
+    field: re.sub(r'([A-Z])', r'_\1', field).lower()
+    for field in (
+        "app_activity", "appActivity", "start_url", "startUrl",
+        "udid", "xcode_org_id", "xcodeOrgId", "wda_bundle_id", "wdaBundleId",
+        "xcode_signing_id", "xcodeSigningId", "browser_name", "browserName"
+    )
+}
+
+# app_info keys that may carry an app name, bundle ID / package or app path, checked in order
+APP_ID_KEYS = ("app", "bundle_id", "bundleId", "app_package", "appPackage", "app_path", "appPath")
+
+# Android launch activities for the COMMON_APPS packages
+ANDROID_ACTIVITIES = {
+    "com.android.chrome": "com.google.android.apps.chrome.Main",
+    "com.android.settings": "com.android.settings.Settings",
+    "com.android.contacts": "com.android.contacts.activities.PeopleActivity", 
+    "com.android.dialer": "com.android.dialer.main.impl.MainActivity",
+    "com.google.android.apps.messaging": ".ui.ConversationListActivity",
+    "com.google.android.apps.photos": "com.google.android.apps.photos.home.HomeActivity",
+    "com.google.android.calculator": "com.android.calculator2.Calculator",
+    "com.google.calendar": ".AllInOneActivity",
+    "com.google.android.gm": ".ConversationListActivityGmail",
+    "com.google.android.apps.maps": "com.google.android.maps.MapsActivity",
+    "com.google.android.youtube": ".app.honeycomb.Shell$HomeActivity",
+    "com.android.vending": ".AssetBrowserActivity"
+}
+
+# Common app bundle ID mappings for your existing server
+COMMON_APPS = {
+    "ios": {
+        "settings": "com.apple.Preferences",
+        "safari": "com.apple.mobilesafari", 
+        "notes": "com.apple.mobilenotes",
+        "photos": "com.apple.mobileslideshow",
+        "messages": "com.apple.MobileSMS",
+        "phone": "com.apple.mobilephone",
+        "calculator": "com.apple.calculator",
+        "calendar": "com.apple.mobilecal",
+        "contacts": "com.apple.MobileAddressBook",
+        "music": "com.apple.Music",
+        "maps": "com.apple.Maps",
+        "weather": "com.apple.weather",
+        "clock": "com.apple.mobiletimer",
+        "reminder": "com.apple.reminders",
+        "mail": "com.apple.mobilemail",
+        "files": "com.apple.DocumentsApp",
+        "facetime": "com.apple.facetime",
+        "podcasts": "com.apple.podcasts"
+    },
+    "android": {
+        "settings": "com.android.settings",
+        "chrome": "com.android.chrome",
+        "contacts": "com.android.contacts",
+        "phone": "com.android.dialer",
+        "messages": "com.google.android.apps.messaging",
+        "gallery": "com.google.android.apps.photos",
+        "calculator": "com.google.android.calculator",
+        "calendar": "com.google.calendar",
+        "gmail": "com.google.android.gm",
+        "maps": "com.google.android.apps.maps",
+        "youtube": "com.google.android.youtube",
+        "play": "com.android.vending"
+    }
+}
+
+# Generic element ID placeholders LLMs emit instead of a real ID (e.g. Gemini's "element_id_from_previous_step")
+INVALID_ELEMENT_ID_PATTERNS = frozenset({
+    "element_id_from_previous_step",
+    "previous_element_id",
+    "found_element_id",
+    "current_element_id",
+    "last_element_id",
+    "element_from_previous_step",
+    "previous_element",
+    None,
+    "",
+    "null"
+})
+
+# Page-source attribute -> element_info key, applied in order (Android content-desc overrides iOS name)
+ELEMENT_STRING_ATTRS = (
+    ("name", "accessibility_id"),
+    ("label", "label"),
+    ("content-desc", "accessibility_id"),
+    ("resource-id", "id"),
+    ("class", "class_name")
+)
+
+# Attributes used as element text, in priority order, when the element has no text content
+ELEMENT_TEXT_ATTRS = ("label", "value", "text")
+
+# Boolean flags: (key, source attributes in priority order, default). Android clickable
+# wins over iOS accessible, so accessible is only looked up when clickable is absent.
+ELEMENT_BOOL_ATTRS = (
+    ("clickable", ("clickable", "accessible"), False),
+    ("enabled", ("enabled",), True)
+)
+
+# Container tags that are not worth reporting unless they carry text or an identifier
+BORING_ELEMENT_TAGS = frozenset({
+    'hierarchy', 'android.widget.FrameLayout',
+    'XCUIElementTypeApplication', 'XCUIElementTypeWindow', 'XCUIElementTypeOther'
+})
+
+# XPath fallbacks for reading the value next to an iOS "Name" cell, in priority order
+NAME_CELL_XPATHS = (
+    "//XCUIElementTypeCell[@name='Name']//XCUIElementTypeStaticText[2]",
+    "//XCUIElementTypeStaticText[@name='Name']/following-sibling::XCUIElementTypeStaticText[1]",
+    "//XCUIElementTypeCell[.//XCUIElementTypeStaticText[@name='Name']]//XCUIElementTypeStaticText[position()>1]",
+    "//*[@name='Name']/..//XCUIElementTypeStaticText[not(@name='Name')]"
+)
+
+# _find_and_tap_alternatives: elements carrying the same text, in priority order.
+# {0} is the XPath string literal built by xpath_literal().
+ALTERNATIVE_TEXT_XPATHS = (
+    "//*[text()={0}]",
+    "//*[contains(text(), {0})]",
+    "//button[text()={0}]",
+    "//a[text()={0}]",
+)
+
+# ---------------------------------------------------------------------------
+# Precompiled regular expressions (compiled once at import instead of per call)
+# ---------------------------------------------------------------------------
+
+# recover_text_via_page_source: value next to the iOS "Name" cell, tried in priority order
+# (the loose last pattern must only run when the specific ones found nothing)
+NAME_RECOVERY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    r'name=["\']Name["\'][^>]*>.*?name=["\']([^"\']+)["\']',
+    r'label=["\']Name["\'][^>]*>.*?value=["\']([^"\']+)["\']',
+    r'<[^>]*name=["\']Name["\'][^>]*>.*?<[^>]*>([^<]+)</[^>]*>',
+    r'Name.*?<[^>]*>([^<]+)</[^>]*>'
+))
+
+# _analyze_html_for_candidates: (pattern prefix, match lowercased target?, candidate kind).
+# The escaped target is spliced in between the prefix and HTML_CANDIDATE_SUFFIX.
+HTML_CANDIDATE_PREFIXES = (
+    # Input fields
+    (r'<input[^>]*id=["\']([^"\']*(?:', True, "id"),
+    (r'<input[^>]*name=["\']([^"\']*(?:', True, "name"),
+    (r'<input[^>]*class=["\']([^"\']*(?:', True, "class"),
+    # Buttons
+    (r'<button[^>]*id=["\']([^"\']*(?:', True, "id"),
+    (r'<button[^>]*class=["\']([^"\']*(?:', True, "class"),
+    (r'<input[^>]*type=["\']submit["\'][^>]*value=["\']([^"\']*(?:', False, "value"),
+    # Links
+    (r'<a[^>]*id=["\']([^"\']*(?:', True, "id"),
+    (r'<a[^>]*class=["\']([^"\']*(?:', True, "class"),
+)
+HTML_CANDIDATE_SUFFIX = r')[^"\']*)["\']'
+
+# The same lookups as precompiled XPath over an lxml.html tree (used when lxml is installed; the
+# regexes above stay as the fallback). $needle is the lowercased target; matching is case-insensitive.
+HTML_CANDIDATE_XPATH_FILTER = (
+    "[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), $needle)]"
+)
+HTML_CANDIDATE_XPATH_EXPRS = (
+    ("//input/@id", "id"),
+    ("//input/@name", "name"),
+    ("//input/@class", "class"),
+    ("//button/@id", "id"),
+    ("//button/@class", "class"),
+    ("//input[@type='submit']/@value", "value"),
+    ("//a/@id", "id"),
+    ("//a/@class", "class"),
+)
+HTML_CANDIDATE_XPATHS = tuple(
+    (ET.XPath(expr + HTML_CANDIDATE_XPATH_FILTER), kind) for expr, kind in HTML_CANDIDATE_XPATH_EXPRS
+) if lxml_html is not None else ()
+
+# _extract_text_from_xpath_or_value: any XPath/attribute syntax character (plain text has none)
+XPATH_SPECIAL_CHARS_PATTERN = re.compile(r"[@/\[\]()\"']")
+
+# _extract_text_from_xpath_or_value: XPath and attribute patterns, ordered by reliability.
+# @attr='value' and contains(@attr, 'value') are each one tagged pattern; the captured attribute
+# name is ranked through its priority table, so the value is scanned once per family.
+XPATH_ATTR_EQUALS_PATTERN = re.compile(r"@([\w-]+)\s*=\s*['\"]([^'\"]+)['\"]")
+XPATH_ATTR_EQUALS_PRIORITY = {
+    # Web-specific HTML attributes (most reliable for web)
+    "id": 0, "name": 1, "class": 2, "data-test": 3, "data-testid": 4, "placeholder": 5,
+    "value": 6, "type": 7, "href": 8, "title": 9, "alt": 10,
+    # Mobile app attributes (for native contexts)
+    "text": 11, "label": 12, "content-desc": 13, "resource-id": 14,
+}
+XPATH_TEXT_FUNCTION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"contains\(text\(\),\s*['\"]([^'\"]+)['\"]",     # contains(text(), 'value')
+    r"text\(\)\s*=\s*['\"]([^'\"]+)['\"]",            # text()='value'
+    r"normalize-space\(text\(\)\)\s*=\s*['\"]([^'\"]+)['\"]",  # normalize-space(text())='value'
+))
+XPATH_CONTAINS_ATTR_PATTERN = re.compile(r"contains\(@([\w-]+),\s*['\"]([^'\"]+)['\"]", re.IGNORECASE)
+XPATH_CONTAINS_ATTR_PRIORITY = {
+    "text": 0, "label": 1, "name": 2, "class": 3, "id": 4, "data-test": 5, "placeholder": 6,
+}
+# Generic quoted text (fallback)
+XPATH_QUOTED_TEXT_PATTERNS = (re.compile(r"'([^']+)'"), re.compile(r'"([^"]+)"'))
+
+# _is_meaningful_text: obviously technical/non-meaningful values (matched against lowercased text)
+# (one anchored alternation, so a value is tested with a single match() call)
+TECHNICAL_TEXT_PATTERN = re.compile('|'.join((
+    r'[a-f0-9]{8,}$',           # Long hex strings
+    r'[0-9]{8,}$',              # Long numeric IDs
+    r'[a-z0-9_-]{20,}$',        # Long technical identifiers
+    r'\w+\.\w+\.\w+',           # Package-like names (com.example.app)
+)))
+
+# _is_meaningful_text: common UI words that make a longer value meaningful
+MEANINGFUL_TEXT_KEYWORDS = (
+    'username', 'password', 'login', 'email', 'submit', 'button',
+    'menu', 'logout', 'sign', 'user', 'pass', 'name', 'text',
+    'search', 'click', 'tap', 'press', 'next', 'back', 'home',
+    'settings', 'profile', 'account', 'continue', 'cancel', 'ok'
+)
+
+# _intelligent_text_parsing
+XPATH_CONDITION_PATTERN = re.compile(r'\[([^\]]+)\]')
+UI_WORD_PATTERN = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# _build_smart_strategies: target keywords that select each family of web locator strategies
+USERNAME_KEYWORDS = frozenset({'username', 'user', 'email', 'login', 'account', 'userid', 'user_name', 'user-name'})
+PASSWORD_KEYWORDS = frozenset({'password', 'pass', 'pwd', 'passcode', 'passphrase'})
+BUTTON_KEYWORDS = frozenset({'login', 'submit', 'sign in', 'log in', 'continue', 'next', 'enter', 'go', 'send', 'confirm'})
+LINK_KEYWORDS = frozenset({'logout', 'sign out', 'log out', 'exit', 'quit', 'home', 'back', 'menu', 'settings'})
+MENU_KEYWORDS = frozenset({'menu', 'hamburger', 'burger', 'nav', 'navigation', 'toggle'})
+
+# Strategy category -> keywords, and the inverse keyword -> categories (e.g. "login" selects two)
+TARGET_CATEGORY_KEYWORDS = {
+    "username": USERNAME_KEYWORDS,
+    "password": PASSWORD_KEYWORDS,
+    "button": BUTTON_KEYWORDS,
+    "link": LINK_KEYWORDS,
+    "menu": MENU_KEYWORDS,
+}
+TARGET_KEYWORD_CATEGORIES = {
+    keyword: frozenset(category for category, keywords in TARGET_CATEGORY_KEYWORDS.items() if keyword in keywords)
+    for keywords in TARGET_CATEGORY_KEYWORDS.values()
+    for keyword in keywords
+}
+
+# Common submit button IDs/names, tried in order
+SUBMIT_BUTTON_IDS = ('login', 'submit', 'signin', 'login-button', 'submit-button', 'continue', 'next', 'send')
+
+# Debug logs of MCP traffic show at most this many bytes of each message (page sources are huge)
+DEBUG_PAYLOAD_PREVIEW = 200
+
+
+def payload_preview(data: bytes) -> str:
+    """Decode the start of a raw MCP message for debug logging, noting how much was cut off."""
+    preview = data[:DEBUG_PAYLOAD_PREVIEW].decode("utf-8", errors="replace").strip()
+    if len(data) > DEBUG_PAYLOAD_PREVIEW:
+        preview += f"... ({len(data)} bytes)"
+    return preview
+
+
+@lru_cache(maxsize=64)
+def html_candidate_patterns(target_text: str, target_lower: str) -> Tuple[Tuple[re.Pattern, str], ...]:
+    """Compile the _analyze_html_for_candidates patterns for one target (cached per target)."""
+    return tuple(
+        (re.compile(prefix + re.escape(target_lower if use_lower else target_text) + HTML_CANDIDATE_SUFFIX,
+                    re.IGNORECASE), kind)
+        for prefix, use_lower, kind in HTML_CANDIDATE_PREFIXES
+    )
+
+
+def ranked_attribute_values(pattern: re.Pattern, priority: Dict[str, int], value: str) -> List[str]:
+    """Values captured by a tagged (attribute, value) pattern, ordered by attribute priority then position.
+
+    Attributes missing from the priority table are ignored.
+    """
+    ranked = sorted(
+        (priority[match.group(1).lower()], match.start(), match.group(2))
+        for match in pattern.finditer(value)
+        if match.group(1).lower() in priority
+    )
+    return [found for _, _, found in ranked]
+
+
+def xpath_text_candidates(value: str):
+    """Yield the text candidates of an XPath/attribute locator in reliability order (lazily, family by family).
+
+    Each family is skipped with a substring test when the value cannot contain it.
+    """
+    if '@' in value:
+        yield from ranked_attribute_values(XPATH_ATTR_EQUALS_PATTERN, XPATH_ATTR_EQUALS_PRIORITY, value)
+    value_lower = value.lower()  # the function patterns are case-insensitive
+    if 'text()' in value_lower:
+        for pattern in XPATH_TEXT_FUNCTION_PATTERNS:
+            yield from pattern.findall(value)
+    if 'contains(@' in value_lower:
+        yield from ranked_attribute_values(XPATH_CONTAINS_ATTR_PATTERN, XPATH_CONTAINS_ATTR_PRIORITY, value)
+    for pattern in XPATH_QUOTED_TEXT_PATTERNS:
+        yield from pattern.findall(value)
+
+
+def _build_keyword_automaton():
+    """Build the Aho-Corasick automaton over TARGET_KEYWORD_CATEGORIES, or None without pyahocorasick."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword, categories in TARGET_KEYWORD_CATEGORIES.items():
+        automaton.add_word(keyword, categories)
+    automaton.make_automaton()
+    return automaton
+
+
+TARGET_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+
+def classify_target(target_lower: str) -> frozenset:
+    """Return the strategy categories whose keywords occur anywhere in target_lower."""
+    if TARGET_KEYWORD_AUTOMATON is not None:
+        matches = (categories for _, categories in TARGET_KEYWORD_AUTOMATON.iter(target_lower))
+    else:
+        matches = (categories for keyword, categories in TARGET_KEYWORD_CATEGORIES.items() if keyword in target_lower)
+    return frozenset().union(*matches)
+
+
+def xpath_literal(text: str) -> str:
+    """Quote text as an XPath 1.0 string literal (concat() when it holds both quote kinds)."""
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in text.split("'")) + ")"
+
+
+def css_literal(text: str) -> str:
+    """Quote text as a CSS string for attribute selectors (backslashes, quotes and newlines escaped)."""
+    escaped = text.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\a ").replace("\r", "\\d ")
+    return f"'{escaped}'"
+
+
+@lru_cache(maxsize=256)
+def smart_web_strategies(target_lower: str, target_text: str) -> Tuple[Tuple[str, str], ...]:
+    """Build intelligent strategies based on semantic analysis (cached - they depend only on the target).
+
+    Attribute-only lookups are emitted as CSS selectors - XPath is the slowest locator strategy
+    in a web context - and XPath is kept only where text() matching is needed.
+    """
+    strategies = []
+    categories = classify_target(target_lower)
+    text_literal = xpath_literal(target_text)  # quoted once, safe for text containing apostrophes
+    css_text_literal = css_literal(target_text)
+    lower_literal = css_literal(target_lower)
+
+    # USERNAME/EMAIL FIELD DETECTION
+    if "username" in categories:
+        strategies.extend([
+            # Common ID patterns
+            ("id", "username"), ("id", "user"), ("id", "email"), ("id", "login"),
+            ("id", "user-name"), ("id", "user_name"), ("id", "userid"), ("id", "account"),
+            # Common name patterns
+            ("name", "username"), ("name", "user"), ("name", "email"), ("name", "login"),
+            ("name", "user-name"), ("name", "user_name"), ("name", "userid"),
+            # Input type and placeholder patterns
+            ("css_selector", "input[type='text']"),   # First text input
+            ("css_selector", "input[type='email']"),  # Email input type
+            ("css_selector", "input[placeholder*='username'], input[placeholder*='user'], input[placeholder*='email'], input[placeholder*='login']"),
+            # Data attribute patterns
+            ("css_selector", "input[data-test*='username'], input[data-test*='user'], input[data-test*='login']"),
+            ("css_selector", "input[data-testid*='username'], input[data-testid*='user'], input[data-testid*='login']"),
+            # Class patterns
+            ("css_selector", "input[class*='username'], input[class*='user'], input[class*='email'], input[class*='login']"),
+        ])
+
+    # PASSWORD FIELD DETECTION
+    if "password" in categories:
+        strategies.extend([
+            # Common ID patterns
+            ("id", "password"), ("id", "pass"), ("id", "pwd"), ("id", "passcode"),
+            # Common name patterns  
+            ("name", "password"), ("name", "pass"), ("name", "pwd"), ("name", "passcode"),
+            # Password input type (most reliable)
+            ("css_selector", "input[type='password']"),
+            # Placeholder patterns
+            ("css_selector", "input[placeholder*='password'], input[placeholder*='pass']"),
+            # Data attribute patterns
+            ("css_selector", "input[data-test*='password'], input[data-test*='pass']"),
+            ("css_selector", "input[data-testid*='password'], input[data-testid*='pass']"),
+            # Class patterns
+            ("css_selector", "input[class*='password'], input[class*='pass']"),
+        ])
+
+    # BUTTON/SUBMIT DETECTION
+    if "button" in categories:
+        # Try common button IDs first
+        for btn_id in SUBMIT_BUTTON_IDS:
+            strategies.append(("id", btn_id))
+            strategies.append(("name", btn_id))
+    
+        strategies.extend([
+            #Submit input buttons
+            ("css_selector", "input[type='submit']"),
+            ("css_selector", "button[type='submit']"),
+            # Value-based detection
+            ("css_selector", f"input[value={css_text_literal}], input[value*={lower_literal}]"),
+            ("xpath", f"//button[text()={text_literal} or contains(text(), {text_literal})]"),
+            # Generic button patterns
+            ("css_selector", "button[class*='btn'], button[class*='button']"),
+            ("css_selector", f"button[class*={lower_literal}]"),
+            # Data attribute patterns
+            ("css_selector", f"button[data-test*={lower_literal}], button[data-testid*={lower_literal}]"),
+            ("css_selector", f"input[data-test*={lower_literal}], input[data-testid*={lower_literal}]"),
+        ])
+
+    # LINK DETECTION
+    if "link" in categories:
+        strategies.extend([
+            # Direct link text
+            ("link text", target_text),
+            ("partial link text", target_text),
+            # ID-based links
+            ("id", target_lower), ("id", target_lower.replace(' ', '-')), ("id", target_lower.replace(' ', '_')),
+            # Link patterns
+            ("xpath", f"//a[contains(text(), {text_literal}) or @title={text_literal}]"),
+            ("css_selector", f"a[href*={lower_literal}], a[class*={lower_literal}]"),
+            # Data attribute patterns
+            ("css_selector", f"a[data-test*={lower_literal}], a[data-testid*={lower_literal}]"),
+        ])
+
+    # MENU/NAVIGATION DETECTION
+    if "menu" in categories:
+        strategies.extend([
+            # Common menu IDs
+            ("id", "menu"), ("id", "nav"), ("id", "hamburger"), ("id", "burger"), ("id", "toggle"),
+            ("id", "menu-button"), ("id", "nav-button"), ("id", "menu-toggle"),
+            # Class-based detection
+            ("css_selector", "button[class*='menu'], button[class*='burger'], button[class*='hamburger']"),
+            ("css_selector", "div[class*='menu'], div[class*='burger'], div[class*='hamburger']"),
+            # Icon patterns (common in modern web)
+            ("css_selector", "button[class*='icon'][class*='menu'], button[class*='icon'][aria-label*='menu']"),
+            # ARIA patterns
+            ("css_selector", "button[aria-label='Menu'], button[aria-label='Open menu'], button[aria-label*='menu']"),
+        ])
+
+    # GENERIC TEXT/ELEMENT DETECTION (for anything else)
+    else:
+        # Try common patterns for any text
+        safe_text = target_lower.replace(' ', '-')
+        safe_text_underscore = target_lower.replace(' ', '_')
+    
+        strategies.extend([
+            # ID patterns
+            ("id", target_lower), ("id", safe_text), ("id", safe_text_underscore),
+            # Name patterns
+            ("name", target_lower), ("name", safe_text), ("name", safe_text_underscore),
+            # Class patterns
+            ("css_selector", f"[class*={lower_literal}], [class*={css_literal(safe_text)}]"),
+            # Data patterns
+            ("css_selector", f"[data-test*={lower_literal}], [data-testid*={lower_literal}]"),
+            # Generic text content
+            ("xpath", f"//*[contains(text(), {text_literal}) or @title={text_literal} or @alt={text_literal}]"),
+        ])
+
+    return tuple(strategies)
+
+
+def extract_element(elem) -> Optional[Dict[str, Any]]:
+    """Extract one page-source element (no getparent() used), or None if it carries nothing useful."""
+    attribs = elem.attrib
+    
+    # Extract element information - only fields with a value are set, so no cleanup pass is needed
+    element_info = {"tag": elem.tag}
+    
+    # Extract text content (stripped once; whitespace-only text counts as none)
+    text = (elem.text or "").strip() or None
+    
+    # iOS + Android attributes - one lookup each, later entries override earlier ones
+    for attr, key in ELEMENT_STRING_ATTRS:
+        value = attribs.get(attr)
+        if value is not None:
+            element_info[key] = value
+    
+    # Fall back to label/value/text attributes if no text content exists
+    for attr in ELEMENT_TEXT_ATTRS:
+        if text:
+            break
+        value = attribs.get(attr)
+        if value is not None:
+            text = value
+    if text is not None:
+        element_info["text"] = text
+    
+    # Only include elements that have useful information
+    has_useful_info = (
+        text or 
+        element_info.get("accessibility_id") or 
+        element_info.get("id") or
+        element_info.get("label") or
+        (element_info["tag"] and element_info["tag"] not in BORING_ELEMENT_TAGS)
+    )
+    
+    if not has_useful_info:
+        return None
+    
+    # Most nodes are discarded above, so the xpath and flags are only built for kept elements
+    element_info["xpath"] = f"//{elem.tag}"
+    for key, attrs, is_set in ELEMENT_BOOL_ATTRS:
+        for attr in attrs:
+            value = attribs.get(attr)
+            if value is not None:
+                is_set = value.lower() == 'true'
+                break
+        if is_set:
+            element_info[key] = True
+    return element_info
+
+
 class EnhancedMCPClient:
     def __init__(self, process):
         self.process = process
         self.request_id = 0
-        self.element_store = {}  
+        self._pending = {}  # JSON-RPC request id -> asyncio.Future resolved by _read_responses
+        self._reader = None
+        self._writer = None
+        self._read_transport = None
+        self._reader_task = None
+        self._transport_ready = None  # future shared by concurrent first requests while the pipes attach
+        self._transport_error = None  # why _read_responses stopped on its own; later sends fail fast with it
+        self.element_store = OrderedDict()  # bounded LRU, written through remember_element()
         self.last_element_id = None
         self.last_find_result = None
         self.last_result = None  # Store last tool result for variable substitution
+        self._candidate_index = None  # (elements, exact_index, casefolded rows, corpus, field starts) for _find_element_candidates
+        self._page_cache = None  # ((length, hash, max_elements), elements) of the last parsed page source
+        self._miss_cache = {}  # (strategy, value) -> page key of the screen where smart_find_element failed
+        self._locator_index = {}  # (strategy, value) -> (element_id, monotonic time found) for _find_cached
+        self._resolved_activities = {}  # Android package -> launch activity resolved through adb (successes only)
+        self._web_context_cached: Optional[bool] = None  # _is_web_context result for the current session
+        self._page_source_cache = None  # (monotonic fetch time, full, parsed appium_get_page_source result)
+        self._html_dom_cache = None  # (html source, lxml.html tree) of the last source _html_dom parsed
         self.session_active = False
         self.current_platform = None
         self.project_root = pathlib.Path.home() / "generated-framework"
         
+    def remember_element(self, key, element_id):
+        """Store a found element ID, evicting the least recently stored key beyond ELEMENT_STORE_LIMIT."""
+        self.element_store[key] = element_id
+        self.element_store.move_to_end(key)
+        if len(self.element_store) > ELEMENT_STORE_LIMIT:
+            self.element_store.popitem(last=False)
+        
     def get_next_id(self):
         self.request_id += 1
         return self.request_id
         
+    async def _ensure_transport(self):
+        """Attach the pipes once per client, even when the first requests are issued concurrently."""
+        if self._transport_ready is None:
+            self._transport_ready = asyncio.ensure_future(self._open_transport())
+        await self._transport_ready
+        if self._transport_error is not None:
+            # Nothing reads responses any more, so a new request would wait forever
+            raise Exception(f"MCP transport is closed: {self._transport_error}")
+    
+    async def _open_transport(self):
+        """Attach asyncio streams to the server pipes and start the response reader task."""
+        loop = asyncio.get_running_loop()
+        # run_agent.py shares one server process across several asyncio.run() calls, so the
+        # loop-bound transports get duplicated descriptors and aclose() leaves the pipes open
+        read_pipe = os.fdopen(os.dup(self.process.stdout.fileno()), "rb", buffering=0)
+        write_pipe = os.fdopen(os.dup(self.process.stdin.fileno()), "wb", buffering=0)
+        
+        self._reader = asyncio.StreamReader(limit=MCP_STREAM_LIMIT)
+        self._read_transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(self._reader), read_pipe
+        )
+        write_transport, write_protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, write_pipe
+        )
+        self._writer = asyncio.StreamWriter(write_transport, write_protocol, None, loop)
+        self._reader_task = asyncio.create_task(self._read_responses())
+    
+    async def _read_responses(self):
+        """Resolve pending request futures from server responses, matched by JSON-RPC id."""
+        error = Exception("No response from MCP server")
+        try:
+            while True:
+                response_line = await self._reader.readline()
+                if not response_line:
+                    break
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("📥 Received: %s", payload_preview(response_line))
+                
+                try:
+                    response = _json_loads(response_line)
+                except json.JSONDecodeError as e:
+                    logger.debug("Skipping non-JSON line from MCP server: %s", e)
+                    continue
+                
+                # Server-initiated requests and notifications carry a method and are not ours to resolve
+                if not isinstance(response, dict) or "method" in response:
+                    continue
+                
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except asyncio.CancelledError:
+            error = Exception("MCP client closed")
+            raise
+        except Exception as e:
+            error = Exception(f"MCP transport error: {e}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+        
+        # Only reached when the reader stopped on its own (EOF, over-limit line, broken pipe)
+        self._transport_error = error
+        logger.warning("⚠️ MCP response reader stopped: %s", error)
+    
+    async def aclose(self):
+        """Stop the response reader and close this event loop's transports (the server keeps running)."""
+        if self._reader_task is None:
+            self._transport_ready = None
+            return
+        
+        self._reader_task.cancel()
+        try:
+            await self._reader_task
+        except asyncio.CancelledError:
+            pass
+        
+        self._read_transport.close()
+        self._writer.close()
+        self._reader_task = None
+        self._reader = None
+        self._writer = None
+        self._read_transport = None
+        self._transport_ready = None
+        self._transport_error = None
+        
     async def send_request(self, method, params=None):
+        await self._ensure_transport()
+        
         request = {
             "jsonrpc": "2.0",
             "id": self.get_next_id(),
@@ -46,38 +754,40 @@ class EnhancedMCPClient:
             "params": params or {}
         }
         
-        request_str = json.dumps(request) + "\n"
-        print(f"📤 Sending: {request_str.strip()}")
-        
-        self.process.stdin.write(request_str)
-        self.process.stdin.flush()
-        
-        response_line = self.process.stdout.readline()
-        if not response_line:
-            raise Exception("No response from MCP server")
-            
-        print(f"📥 Received: {response_line.strip()}")
+        # Pipes are binary: write encoded bytes and hand raw response bytes to the JSON decoder
+        request_bytes = _json_dumpline(request)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 Sending: %s", payload_preview(request_bytes))
         
+        # The reader task resolves this future, so concurrent requests share the pipe
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request["id"]] = future
         try:
-            response = json.loads(response_line)
-            if "error" in response:
-                raise Exception(f"MCP Error: {response['error']}")
-            return response.get("result")
-        except json.JSONDecodeError as e:
-            raise Exception(f"Invalid JSON response: {e}")
+            self._writer.write(request_bytes)
+            await self._writer.drain()
+            response = await future
+        finally:
+            self._pending.pop(request["id"], None)
+        
+        if "error" in response:
+            raise Exception(f"MCP Error: {response['error']}")
+        return response.get("result")
     
     async def send_notification(self, method, params=None):
+        await self._ensure_transport()
+        
         notification = {
             "jsonrpc": "2.0",
             "method": method,
             "params": params or {}
         }
         
-        notification_str = json.dumps(notification) + "\n"
-        print(f"📤 Sending notification: {notification_str.strip()}")
+        notification_bytes = _json_dumpline(notification)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 Sending notification: %s", payload_preview(notification_bytes))
         
-        self.process.stdin.write(notification_str)
-        self.process.stdin.flush()
+        self._writer.write(notification_bytes)
+        await self._writer.drain()
     
     async def initialize(self):
         init_result = await self.send_request("initialize", {
@@ -93,17 +803,84 @@ class EnhancedMCPClient:
         return await self.send_request("tools/list")
     
     async def call_tool(self, name, arguments):
+        if name not in READ_ONLY_TOOLS:
+            # Taps, input, scrolls, key presses and session changes alter the screen, so cached
+            # page sources and element ids may no longer match it
+            self._page_source_cache = None
+            self._locator_index.clear()
         return await self.send_request("tools/call", {
             "name": name,
             "arguments": arguments
         })
     
+    async def _cached_page_source(self, full: bool = False, max_age: float = PAGE_SOURCE_TTL) -> Dict[str, Any]:
+        """Fetch appium_get_page_source, reusing a result fetched in the same mode within max_age seconds.
+
+        Returns the parsed tool result. Pass max_age=0 to force a fresh fetch (e.g. when polling for a change).
+        """
+        if self._page_source_cache is not None:
+            fetched_at, cached_full, parsed_result = self._page_source_cache
+            if cached_full == full and time.monotonic() - fetched_at < max_age:
+                return parsed_result
+        
+        result = await self.call_tool("appium_get_page_source", {"full": full})
+        parsed_result = self.parse_tool_result(result)
+        if parsed_result.get('status') == 'success':
+            self._page_source_cache = (time.monotonic(), full, parsed_result)
+        return parsed_result
+    
+    async def _find_cached(self, strategy: str, value: str, ttl: float = LOCATOR_CACHE_TTL) -> Dict[str, Any]:
+        """Call appium_find_element, answering from the locator index when the same locator hit within ttl seconds.
+
+        Returns the parsed tool result; cache hits carry "cached": True.
+        """
+        cached_result = self._locator_hit(strategy, value, ttl)
+        if cached_result is not None:
+            return cached_result
+        
+        result = await self.call_tool("appium_find_element", {"strategy": strategy, "value": value})
+        parsed_result = self.parse_tool_result(result)
+        self._remember_locator(strategy, value, parsed_result)
+        return parsed_result
+    
+    def _locator_hit(self, strategy: str, value: str, ttl: float = LOCATOR_CACHE_TTL) -> Optional[Dict[str, Any]]:
+        """Return a find result from the locator index if the locator hit within ttl seconds, else None."""
+        key = (strategy, value)
+        cached = self._locator_index.get(key)
+        if cached is None:
+            return None
+        element_id, found_at = cached
+        if time.monotonic() - found_at >= ttl:
+            del self._locator_index[key]
+            return None
+        return {
+            "status": "success",
+            "element_id": element_id,
+            "strategy": strategy,
+            "value": value,
+            "message": f"Found element using {strategy}: {value} (cached)",
+            "cached": True
+        }
+    
+    def _remember_locator(self, strategy: str, value: str, parsed_result: Dict[str, Any]):
+        """Record a successful appium_find_element result in the locator index."""
+        if parsed_result.get('status') == 'success' and parsed_result.get('element_id'):
+            self._locator_index[(strategy, value)] = (parsed_result['element_id'], time.monotonic())
+    
+    def _forget_element(self, element_id: str):
+        """Drop every locator index entry pointing at element_id (after an action on it failed)."""
+        self._locator_index = {
+            key: entry for key, entry in self._locator_index.items() if entry[0] != element_id
+        }
+    
     def parse_tool_result(self, result) -> Dict[str, Any]:
         """Parse tool result and extract meaningful data."""
         if isinstance(result, dict) and result.get('content'):
             content_text = result['content'][0]['text']
+            if isinstance(content_text, dict):
+                return content_text  # already structured - nothing to decode
             try:
-                return json.loads(content_text)
+                return _json_loads(content_text)
             except json.JSONDecodeError:
                 return {"status": "error", "message": "Invalid JSON in response"}
         return {"status": "error", "message": "No content in response"}
@@ -112,72 +889,18 @@ class EnhancedMCPClient:
         """Normalize app identifiers for different platforms and apps."""
         platform = app_info.get("platform", "").lower()
         
-        # Common app bundle ID mappings for your existing server
-        common_apps = {
-            "ios": {
-                "settings": "com.apple.Preferences",
-                "safari": "com.apple.mobilesafari", 
-                "notes": "com.apple.mobilenotes",
-                "photos": "com.apple.mobileslideshow",
-                "messages": "com.apple.MobileSMS",
-                "phone": "com.apple.mobilephone",
-                "calculator": "com.apple.calculator",
-                "calendar": "com.apple.mobilecal",
-                "contacts": "com.apple.MobileAddressBook",
-                "music": "com.apple.Music",
-                "maps": "com.apple.Maps",
-                "weather": "com.apple.weather",
-                "clock": "com.apple.mobiletimer",
-                "reminder": "com.apple.reminders",
-                "mail": "com.apple.mobilemail",
-                "files": "com.apple.DocumentsApp",
-                "facetime": "com.apple.facetime",
-                "podcasts": "com.apple.podcasts"
-            },
-            "android": {
-                "settings": "com.android.settings",
-                "chrome": "com.android.chrome",
-                "contacts": "com.android.contacts",
-                "phone": "com.android.dialer",
-                "messages": "com.google.android.apps.messaging",
-                "gallery": "com.google.android.apps.photos",
-                "calculator": "com.google.android.calculator",
-                "calendar": "com.google.calendar",
-                "gmail": "com.google.android.gm",
-                "maps": "com.google.android.apps.maps",
-                "youtube": "com.google.android.youtube",
-                "play": "com.android.vending"
-            }
-        }
-
-         # ADD THIS: Android activity mappings - use correct activities
-        android_activities = {
-            "com.android.chrome": "com.google.android.apps.chrome.Main",
-            "com.android.settings": "com.android.settings.Settings",
-            "com.android.contacts": "com.android.contacts.activities.PeopleActivity", 
-            "com.android.dialer": "com.android.dialer.main.impl.MainActivity",
-            "com.google.android.apps.messaging": ".ui.ConversationListActivity",
-            "com.google.android.apps.photos": "com.google.android.apps.photos.home.HomeActivity",
-            "com.google.android.calculator": "com.android.calculator2.Calculator",
-            "com.google.calendar": ".AllInOneActivity",
-            "com.google.android.gm": ".ConversationListActivityGmail",
-            "com.google.android.apps.maps": "com.google.android.maps.MapsActivity",
-            "com.google.android.youtube": ".app.honeycomb.Shell$HomeActivity",
-            "com.android.vending": ".AssetBrowserActivity"
-        }
-        
         # Extract app information from different possible keys
         app_name = None
         bundle_id = None
         app_path = None
         
         # Handle various app identifier formats
-        for key in ["app", "bundle_id", "bundleId", "app_package", "appPackage", "app_path", "appPath"]:
+        for key in APP_ID_KEYS:
             if key in app_info and app_info[key]:
                 value = str(app_info[key]).lower().strip()
                 
                 # If it looks like a bundle ID, use it directly
-                if "." in value and (value.startswith("com.") or value.startswith("org.") or value.startswith("io.")):
+                if "." in value and value.startswith(BUNDLE_ID_PREFIXES):
                     bundle_id = app_info[key]  # Keep original case
                 # If it's a file path
                 elif value.endswith(".app") or "/" in value:
@@ -187,30 +910,25 @@ class EnhancedMCPClient:
                     app_name = value
         
         # If we have an app name but no bundle ID, try to resolve it
-        if app_name and not bundle_id and platform in common_apps:
-            bundle_id = common_apps[platform].get(app_name)
+        if app_name and not bundle_id and platform in COMMON_APPS:
+            bundle_id = COMMON_APPS[platform].get(app_name)
         
         # Build the normalized app info to match your existing server expectations
-        normalized = {
-            "platform": app_info.get("platform"),
-            "device_name": app_info.get("device_name") or app_info.get("deviceName")
-        }
+        # Keys are only set when they have a value, so callers can send this as-is
+        normalized = {}
+        if app_info.get("platform") is not None:
+            normalized["platform"] = app_info.get("platform")
+        device_name = app_info.get("device_name") or app_info.get("deviceName")
+        if device_name is not None:
+            normalized["device_name"] = device_name
         
         # Add platform version if provided
         if app_info.get("platform_version") or app_info.get("platformVersion"):
             normalized["platform_version"] = app_info.get("platform_version") or app_info.get("platformVersion")
         
         # Add any other optional parameters that your server supports
-        optional_fields = [
-            "app_activity", "appActivity", "start_url", "startUrl",
-            "udid", "xcode_org_id", "xcodeOrgId", "wda_bundle_id", "wdaBundleId",
-            "xcode_signing_id", "xcodeSigningId,""browser_name", "browserName"
-        ]
-        
-        for field in optional_fields:
+        for field, normalized_field in OPTIONAL_SESSION_FIELDS.items():
             if field in app_info and app_info[field]:
-                # Normalize field names to snake_case to match your server
-                normalized_field = re.sub(r'([A-Z])', r'_\1', field).lower()
                 normalized[normalized_field] = app_info[field]
         
         # Add the appropriate app identifier based on your server's expectations
@@ -241,7 +959,7 @@ class EnhancedMCPClient:
                     if bundle_id == "com.android.chrome" and app_info.get("start_url"):
                     # Use browser capabilities instead of app capabilities
                         normalized["browser_name"] = "Chrome"
-                        print(f"DEBUG: Chrome browser mode enabled for URL: {app_info.get('start_url')}")
+                        logger.debug("Chrome browser mode enabled for URL: %s", app_info.get('start_url'))
 
                     # Don't set app_package/app_activity for browser mode
                     else:
@@ -249,24 +967,27 @@ class EnhancedMCPClient:
                         normalized["app_package"] = bundle_id
                     # Use correct Android activity mapping
                         if not app_info.get("app_activity") and not app_info.get("appActivity"):
-                            if bundle_id in android_activities:
-                                normalized["app_activity"] = android_activities[bundle_id]
+                            if bundle_id in ANDROID_ACTIVITIES:
+                                normalized["app_activity"] = ANDROID_ACTIVITIES[bundle_id]
                             else:
                             # Fallback to generic pattern only if no specific mapping exists
-                                 # Dynamic resolution fallback instead of guessing
-                                try:
-                                    resolved = subprocess.check_output(
-                                    ["adb", "shell", "cmd", "package", "resolve-activity", "--brief", bundle_id],
-                                    stderr=subprocess.STDOUT
-                                    ).decode().strip()
-                                    if "/" in resolved:
-                                        normalized["app_activity"] = resolved.split("/", 1)[1]
-                                        print(f"DEBUG: Dynamically resolved activity for {bundle_id}: {normalized['app_activity']}")
-                                    else:
-                                        raise ValueError("No activity found")
-                                except Exception:
-                                    print(f"WARNING: Could not resolve activity for {bundle_id}, skipping launch.")
-                                    normalized["app_activity"] = None
+                                 # Dynamic resolution fallback instead of guessing (adb answers are kept per client)
+                                if bundle_id in self._resolved_activities:
+                                    normalized["app_activity"] = self._resolved_activities[bundle_id]
+                                else:
+                                    try:
+                                        resolved = subprocess.check_output(
+                                        ["adb", "shell", "cmd", "package", "resolve-activity", "--brief", bundle_id],
+                                        stderr=subprocess.STDOUT
+                                        ).decode().strip()
+                                        if "/" in resolved:
+                                            normalized["app_activity"] = resolved.split("/", 1)[1]
+                                            self._resolved_activities[bundle_id] = normalized["app_activity"]
+                                            logger.debug("Dynamically resolved activity for %s: %s", bundle_id, normalized['app_activity'])
+                                        else:
+                                            raise ValueError("No activity found")
+                                    except Exception:
+                                        logger.warning("Could not resolve activity for %s, skipping launch.", bundle_id)
             elif app_path:
                 normalized["app_path"] = app_path
         
@@ -276,14 +997,13 @@ class EnhancedMCPClient:
         """Start an Appium session using your existing server."""
         print(f"🚀 Starting session for {session_args.get('platform')} app...")
         
-        # Normalize the session arguments
-        normalized_args = self.normalize_app_identifier(session_args)
+        # Normalize the session arguments (normalize_app_identifier never sets None values)
+        clean_args = self.normalize_app_identifier(session_args)
         
-        # Remove any None values
-        clean_args = {k: v for k, v in normalized_args.items() if v is not None}
-        
-        print(f"📋 Normalized session args: {json.dumps(clean_args, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📋 Normalized session args: %s", json.dumps(clean_args, indent=2))
         
+        self._web_context_cached = None
         result = await self.call_tool("appium_start_session", clean_args)
         parsed_result = self.parse_tool_result(result)
         
@@ -291,20 +1011,31 @@ class EnhancedMCPClient:
             self.session_active = True
             self.current_platform = clean_args.get('platform', '').lower()
             print(f"✅ Session started successfully for {self.current_platform}")
+            if self.current_platform == 'ios':
+                await self._apply_page_source_settings()
         else:
             print(f"❌ Session failed: {parsed_result}")
             
         return parsed_result
     
+    async def _apply_page_source_settings(self):
+        """Trim the iOS page source once per session; older servers without the tool are left as-is."""
+        try:
+            result = await self.call_tool("appium_update_settings", {"settings": IOS_PAGE_SOURCE_SETTINGS})
+            parsed_result = self.parse_tool_result(result)
+            if parsed_result.get('status') != 'success':
+                print(f"⚠️ Could not apply page source settings: {parsed_result.get('message')}")
+        except Exception as e:
+            print(f"⚠️ Could not apply page source settings: {e}")
+    
     async def enhanced_extract_selectors(self, max_elements: int = 50) -> Dict[str, Any]:
         """
         Fixed XML parser that works with standard ElementTree - no getparent() used
         """
-        print(f"🔍 Using enhanced XML parser to extract elements...")
+        logger.info("🔍 Using enhanced XML parser to extract elements...")
         
         # First get the raw page source from your existing server
-        page_source_result = await self.call_tool("appium_get_page_source", {"full": True})
-        parsed_page_source = self.parse_tool_result(page_source_result)
+        parsed_page_source = await self._cached_page_source(full=True)
         
         if parsed_page_source.get('status') != 'success':
             return {"status": "error", "message": "Failed to get page source"}
@@ -313,99 +1044,45 @@ class EnhancedMCPClient:
         if not xml_source:
             return {"status": "error", "message": "Empty page source"}
         
-        # Parse mobile XML properly
-        import xml.etree.ElementTree as ET
+        # Same screen as the last parse - reuse the extracted elements instead of re-parsing
+        page_key = (len(xml_source), _source_hash(xml_source), max_elements)
+        if self._page_cache is not None and self._page_cache[0] == page_key:
+            elements = self._page_cache[1]
+            logger.info("✅ Enhanced parser reused %s cached elements", len(elements))
+            return {
+                "status": "success",
+                "elements": elements,
+                "total_found": len(elements),
+                "source": "enhanced_xml_parser"
+            }
         
-        try:
-            root = ET.fromstring(xml_source)
-        except ET.ParseError as e:
-            return {"status": "error", "message": f"Failed to parse XML: {str(e)}"}
-
+        # Parse mobile XML lazily with a pull parser so we stop once max_elements is reached
         elements = []
-        count = 0
         
-        # Simple recursive traversal - NO getparent() used
-        def traverse_element(elem):
-            nonlocal count
-            if count >= max_elements:
-                return
-                
-            attribs = elem.attrib
-            
-            # Extract element information
-            element_info = {
-                "tag": elem.tag,
-                "text": None,
-                "accessibility_id": None,
-                "id": None,
-                "class_name": None,
-                "xpath": f"//{elem.tag}",
-                "clickable": False,
-                "enabled": True,
-                "label": None
-            }
-            
-            # Extract text content
-            if elem.text and elem.text.strip():
-                element_info["text"] = elem.text.strip()
-            
-            # iOS attributes - extract both name and label
-            if 'name' in attribs:
-                element_info["accessibility_id"] = attribs['name']
-            if 'label' in attribs:
-                element_info["label"] = attribs['label']
-                # Use label as text if no text content exists
-                if not element_info["text"]:
-                    element_info["text"] = attribs['label']
-            if 'value' in attribs and not element_info["text"]:
-                element_info["text"] = attribs['value']
-            if 'accessible' in attribs:
-                element_info["clickable"] = attribs['accessible'].lower() == 'true'
-            if 'enabled' in attribs:
-                element_info["enabled"] = attribs['enabled'].lower() == 'true'
-                
-            # Android attributes  
-            if 'content-desc' in attribs:
-                element_info["accessibility_id"] = attribs['content-desc']
-            if 'resource-id' in attribs:
-                element_info["id"] = attribs['resource-id']
-            if 'class' in attribs:
-                element_info["class_name"] = attribs['class']
-            if 'text' in attribs and not element_info["text"]:
-                element_info["text"] = attribs['text']
-            if 'clickable' in attribs:
-                element_info["clickable"] = attribs['clickable'].lower() == 'true'
-            if 'enabled' in attribs:
-                element_info["enabled"] = attribs['enabled'].lower() == 'true'
-                
-            # Only include elements that have useful information
-            has_useful_info = (
-                element_info["text"] or 
-                element_info["accessibility_id"] or 
-                element_info["id"] or
-                element_info["label"] or
-                (element_info["tag"] and element_info["tag"] not in [
-                    'hierarchy', 'android.widget.FrameLayout', 
-                    'XCUIElementTypeApplication', 'XCUIElementTypeWindow', 'XCUIElementTypeOther'
-                ])
-            )
-            
-            if has_useful_info:
-                # Clean up the element info - remove None and False values
-                clean_element = {k: v for k, v in element_info.items() if v is not None and v != False}
-                elements.append(clean_element)
-                count += 1
-            
-            # Recursively process children
-            for child in elem:
-                if count >= max_elements:
+        # Pre-order walk driven by parser events. An element's text is only guaranteed
+        # once the parser has moved past it, so each element is extracted on the next event.
+        pending = None
+        try:
+            for event, elem in ET.iterparse(io.BytesIO(xml_source.encode("utf-8")), events=("start", "end"),
+                                          **ITERPARSE_OPTIONS):
+                if pending is not None:
+                    clean_element = extract_element(pending)
+                    if clean_element:
+                        elements.append(clean_element)
+                    pending = None
+                if len(elements) >= max_elements:
                     break
-                traverse_element(child)
-        
-        # Start traversal
-        traverse_element(root)
+                if event == "start":
+                    pending = elem
+                else:
+                    elem.clear()  # release children we have already visited
+        except ET.ParseError as e:
+            return {"status": "error", "message": f"Failed to parse XML: {str(e)}"}
         
-        print(f"✅ Enhanced parser found {len(elements)} useful elements")
+        self._page_cache = (page_key, elements)
+        # Casefold the match fields now, once per parsed page, so lookups on this screen don't redo it
+        self._candidate_index = (elements, *self._build_candidate_index(elements))
+        logger.info("✅ Enhanced parser found %s useful elements", len(elements))
         
         return {
             "status": "success",
@@ -416,19 +1093,24 @@ class EnhancedMCPClient:
 
     async def smart_find_element(self, strategy: str, value: str, description: str = None) -> Tuple[Optional[str], Dict[str, Any]]:
         """Enhanced find element with multiple strategies and fallbacks."""
-        print(f"🔍 Looking for element: {description or value} using {strategy}")
+        logger.info("🔍 Looking for element: %s using %s", description or value, strategy)
     
         # NEW: Detect if we're in Safari web context
         if await self._is_web_context():
             return await self._find_web_element(strategy, value, description)
     
-        # EXISTING: Native app logic - keep everything as it was
-        result = await self.call_tool("appium_find_element", {
-            "strategy": strategy,
-            "value": value
-        })
+        # Skip the whole lookup if it already failed on this exact screen (one page-source fetch to confirm)
+        miss_key = (strategy, value)
+        if miss_key in self._miss_cache:
+            extracted = await self.enhanced_extract_selectors(max_elements=50)
+            # Only trust _page_cache when this extraction succeeded; otherwise it may describe an older screen
+            if extracted.get('status') == 'success' and self._page_cache[0] == self._miss_cache[miss_key]:
+                logger.info("⏭️ '%s' was not found on this unchanged screen - skipping lookup", value)
+                return None, {"status": "error", "message": f"Element '{value}' not found (screen unchanged since last miss)"}
+            del self._miss_cache[miss_key]
     
-        parsed_result = self.parse_tool_result(result)
+        # EXISTING: Native app logic - keep everything as it was
+        parsed_result = await self._find_cached(strategy, value)
     
         if parsed_result.get('status') == 'success':
             element_id = parsed_result.get('element_id')
@@ -438,20 +1120,23 @@ class EnhancedMCPClient:
             
                 # Store element for future reference
                 key = description or value
-                self.element_store[key] = element_id
+                self.remember_element(key, element_id)
             
-                print(f"✅ Found element: {element_id}")
-                print(f"🔄 Stored as last_element_id: {self.last_element_id}")
+                logger.info("✅ Found element: %s", element_id)
+                logger.debug("🔄 Stored as last_element_id: %s", self.last_element_id)
                 return element_id, parsed_result
     
         # If direct approach failed, try with page inspection using enhanced parser
-        print(f"❌ Direct search failed, trying with enhanced page inspection...")
+        logger.info("❌ Direct search failed, trying with enhanced page inspection...")
         element_id, result = await self.find_element_with_inspection(value, description)
+        if not element_id and self._page_cache is not None:
+            # Remember the miss against the screen we just inspected
+            self._miss_cache[miss_key] = self._page_cache[0]
         return element_id, result
     
     async def find_element_with_inspection(self, target_text: str, description: str = None) -> Tuple[Optional[str], Dict[str, Any]]:
         """Find element by inspecting available elements using enhanced XML parsing."""
-        print(f"🔍 Inspecting page to find: {description or target_text}")
+        logger.info("🔍 Inspecting page to find: %s", description or target_text)
         
         # Use enhanced XML parser
         parsed_selectors = await self.enhanced_extract_selectors(max_elements=50)
@@ -465,40 +1150,76 @@ class EnhancedMCPClient:
         candidates = self._find_element_candidates(elements, target_text)
         
         if not candidates:
-            print(f"❌ No candidates found for '{target_text}'")
+            logger.info("❌ No candidates found for '%s'", target_text)
             return None, {"status": "error", "message": f"Element '{target_text}' not found"}
         
         # Try candidates in order of match quality
         return await self._try_element_candidates(candidates, target_text, description)
     
+    def _build_candidate_index(self, elements: List[Dict]) -> Tuple[Dict[str, List[int]], List[Tuple[str, str, str]], str, List[int]]:
+        """Casefold each element's text, accessibility_id and label once, and index them by value.
+
+        The fields are also joined into one NUL-separated corpus (with each field's start offset)
+        so a substring lookup is a single str.find sweep instead of three `in` tests per element.
+        """
+        exact_index = {}
+        rows = []
+        starts = []
+        offset = 0
+        for position, element in enumerate(elements):
+            row = (
+                str(element.get('text') or '').casefold().strip(),
+                str(element.get('accessibility_id') or '').casefold().strip(),
+                str(element.get('label') or '').casefold().strip()
+            )
+            for value in set(row):
+                exact_index.setdefault(value, []).append(position)
+            for value in row:
+                starts.append(offset)
+                offset += len(value) + 1
+            rows.append(row)
+        corpus = '\0'.join(chain.from_iterable(rows))
+        return exact_index, rows, corpus, starts
+
     def _find_element_candidates(self, elements: List[Dict], target_text: str) -> List[Tuple[str, Dict]]:
         """Find potential element candidates using various matching strategies."""
-        candidates = []
-        target_lower = target_text.lower().strip()
-        
-        for element in elements:
-            element_text = str(element.get('text') or '').lower().strip()
-            accessibility_id = str(element.get('accessibility_id') or '').lower().strip()
-            label = str(element.get('label') or '').lower().strip()
-            
-            # Exact match (highest priority)
-            if (element_text == target_lower or 
-                accessibility_id == target_lower or
-                label == target_lower):
-                candidates.append(("exact", element))
-            
-            # Contains match
-            elif (target_lower in element_text or 
-                  target_lower in accessibility_id or
-                  target_lower in label):
-                candidates.append(("contains", element))
+        target_lower = target_text.casefold().strip()
+        
+        # Reuse the casefolded index while we are still querying the same element list
+        if self._candidate_index is None or self._candidate_index[0] is not elements:
+            self._candidate_index = (elements, *self._build_candidate_index(elements))
+        _, exact_index, rows, corpus, starts = self._candidate_index
+        exact_positions = exact_index.get(target_lower, ())
+        
+        if not target_lower or '\0' in target_lower:
+            # Every field contains the empty string; a NUL would match across field boundaries
+            matched = [position for position, row in enumerate(rows)
+                       if any(target_lower in field for field in row)]
+        else:
+            # Sweep the joined corpus once; each hit maps back to its field, then its element (3 fields each)
+            matched = []
+            hit = corpus.find(target_lower)
+            while hit != -1:
+                field = bisect_right(starts, hit) - 1
+                position = field // 3
+                matched.append(position)
+                # Skip the rest of this element's fields: one hit is enough to make it a candidate
+                next_field = (position + 1) * 3
+                if next_field >= len(starts):
+                    break
+                hit = corpus.find(target_lower, starts[next_field])
         
-        return candidates
+        # Exact match (highest priority) - an exact hit is also a substring hit
+        return [("exact" if position in exact_positions else "contains", elements[position])
+                for position in matched]
     
     async def _try_element_candidates(self, candidates: List[Tuple[str, Dict]], target_text: str, description: str) -> Tuple[Optional[str], Dict[str, Any]]:
         """Try to find elements from candidates using different strategies."""
+        # Collect every (strategy, value) probe up front, in candidate then strategy priority order.
+        # xpath/class_name values repeat across candidates, so duplicates are probed only once.
+        probes = []
         for match_type, element in candidates:
-            print(f"🎯 Trying {match_type} match: '{element.get('text', 'No text')}'")
+            logger.debug("🎯 Trying %s match: '%s'", match_type, element.get('text', 'No text'))
             
             # Try different locator strategies
             strategies = [
@@ -510,116 +1231,116 @@ class EnhancedMCPClient:
             
             for strategy, value in strategies:
                 if value and str(value).strip():
-                    try:
-                        result = await self.call_tool("appium_find_element", {
-                            "strategy": strategy,
-                            "value": str(value)
-                        })
-                        
-                        parsed_result = self.parse_tool_result(result)
-                        
-                        if parsed_result.get('status') == 'success':
-                            element_id = parsed_result.get('element_id')
-                            if element_id:
-                                self.last_element_id = element_id
-                                print(f"✅ Found using {strategy}='{value}': {element_id}")
-                                return element_id, parsed_result
-                    except Exception as e:
-                        continue
+                    probes.append((strategy, str(value)))
+        probes = list(dict.fromkeys(probes))
+        
+        # The server runs finds one at a time, so probe serially and stop at the first success
+        found = await self._find_first(probes)
+        if found is not None:
+            strategy, value, parsed_result = found
+            element_id = parsed_result['element_id']
+            self.last_element_id = element_id
+            logger.info("✅ Found using %s='%s': %s", strategy, value, element_id)
+            return element_id, parsed_result
         
         return None, {"status": "error", "message": f"Could not find element '{target_text}' with any strategy"}
     
+    def _resolve_element_id(self, element_id: Optional[str]) -> Optional[str]:
+        """Return element_id, or the last found element's ID when it is missing or an LLM placeholder.
+
+        Returns None for a non-string ID (the model sometimes passes a list or dict), which the
+        callers report as a missing element ID.
+        """
+        if element_id is not None and not isinstance(element_id, str):
+            logger.warning("⚠️ Ignoring non-string element ID: %r", element_id)
+            return None
+        if element_id in INVALID_ELEMENT_ID_PATTERNS:  # None and "" are in the set too
+            logger.info("🔄 Using last found element ID: %s", self.last_element_id)
+            return self.last_element_id
+        return element_id
+    
     async def smart_tap_element(self, element_id: str = None) -> Dict[str, Any]:
         """Smart tap using your existing server."""
         
-        # ENHANCED: Handle Gemini's generic element ID patterns
-        invalid_patterns = [
-            "element_id_from_previous_step", 
-            "previous_element_id", 
-            "found_element_id",
-            "current_element_id", 
-            "last_element_id",
-            "element_from_previous_step",
-            "previous_element",
-            None,
-            "",
-            "null"
-        ]
-    
-        # If element_id is invalid or not provided, use the last found element
-        if element_id in invalid_patterns:
-            element_id = self.last_element_id
-            print(f"🔄 Using last found element ID: {element_id}")
-        elif not element_id:
-            element_id = self.last_element_id
+        # If element_id is a generic placeholder or not provided, use the last found element
+        element_id = self._resolve_element_id(element_id)
         
         if not element_id:
             return {"status": "error", "message": "No element ID available for tap"}
         
          # STEP 1: Get page fingerprint before tap
-        print(f"📊 Getting page fingerprint before tap...")
+        logger.debug("📊 Getting page fingerprint before tap...")
         fingerprint_before = await self._get_page_fingerprint()
         
         # STEP 2: Attempt standard tap
-        print(f"👆 Tapping element: {element_id}")
+        logger.info("👆 Tapping element: %s", element_id)
         result = await self.call_tool("appium_tap_element", {"element_id": element_id})
         parsed_result = self.parse_tool_result(result)
        
         if parsed_result.get('status') != 'success':
-            print(f"❌ Standard tap failed: {parsed_result}")
+            logger.info("❌ Standard tap failed: %s", parsed_result)
             return parsed_result
         
         # STEP 3: Wait and check if tap actually worked
-        print("⏰ Waiting for tap to take effect...")
-        await asyncio.sleep(2)
-
-        fingerprint_after = await self._get_page_fingerprint()
+        logger.debug("⏰ Waiting for tap to take effect...")
+        fingerprint_after = await self._wait_for_page_change(fingerprint_before)
         tap_worked = self._did_page_change(fingerprint_before, fingerprint_after)
 
         if tap_worked:
-            print("✅ Standard tap successful - page changed!")
+            self._page_cache = None
+            self._miss_cache.clear()
+            logger.info("✅ Standard tap successful - page changed!")
             return {"status": "success", "message": "Standard tap successful"}
 
          # STEP 4: Standard tap didn't work, try alternative strategies
-        print("⚠️ Standard tap didn't change page - trying alternative strategies...")
+        logger.info("⚠️ Standard tap didn't change page - trying alternative strategies...")
         return await self._try_alternative_tap_methods(element_id, fingerprint_before)
 
+    async def _wait_for_page_change(self, fingerprint_before: Dict, timeout: float = 2.0, interval: float = 0.1,
+                                    max_interval: float = 0.4) -> Dict[str, Any]:
+        """Poll the page fingerprint until its content hash moves away from fingerprint_before or timeout elapses.
+
+        The poll interval starts at interval and backs off by 1.5x up to max_interval. Returns the last
+        fingerprint taken, so a quick navigation is confirmed in ~interval instead of the full timeout.
+        """
+        if not fingerprint_before:
+            # Nothing to compare against - just give the tap the full time to settle
+            await asyncio.sleep(timeout)
+            return await self._get_page_fingerprint()
+        
+        deadline = time.monotonic() + timeout
+        fingerprint_after = {}
+        while True:
+            await asyncio.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            fingerprint_after = await self._get_page_fingerprint(max_age=0)
+            if fingerprint_after and fingerprint_after.get('source_hash') != fingerprint_before.get('source_hash'):
+                return fingerprint_after
+            if time.monotonic() >= deadline:
+                return fingerprint_after
+            interval = min(interval * 1.5, max_interval)
+
     async def smart_get_text(self, element_id: str = None) -> Dict[str, Any]:
         """Smart get text with automatic element resolution and stale element recovery."""
 
-        # ENHANCED: Handle Gemini's generic element ID patterns
-        invalid_patterns = [
-            "element_id_from_previous_step", 
-            "previous_element_id", 
-            "found_element_id",
-            "current_element_id",
-            "last_element_id",
-            "element_from_previous_step",
-            "previous_element",
-            None,
-            "",
-            "null"
-        ]
-    
-        # If element_id is invalid or not provided, use the last found element
-        if element_id in invalid_patterns:
-            element_id = self.last_element_id
-            print(f"🔄 Using last found element ID: {element_id}")
-        elif not element_id:
-            element_id = self.last_element_id
+        # If element_id is a generic placeholder or not provided, use the last found element
+        element_id = self._resolve_element_id(element_id)
 
         if not element_id:
             return {"status": "error", "message": "No element ID available for get text"}
 
-        print(f"📖 Getting text from element: {element_id}")
+        logger.info("📖 Getting text from element: %s", element_id)
         result = await self.call_tool("appium_get_text", {"element_id": element_id})
         parsed_result = self.parse_tool_result(result)
+        if parsed_result.get("status") == "error":
+            self._forget_element(element_id)
 
         # ENHANCED: If stale, try smart recovery strategies
         if (parsed_result.get("status") == "error" and 
         "StaleElementReferenceException" in str(parsed_result.get("message", ""))):
         
-            print("⚠️ Stale element detected, attempting recovery strategies...")
+            logger.info("⚠️ Stale element detected, attempting recovery strategies...")
+            # A stale reference means the screen was rebuilt, so every cached element id is suspect
+            self._locator_index.clear()
         
             # STRATEGY 1: Try to find Name cell and get its value
             recovery_result = await self.recover_name_cell_text()
@@ -646,10 +1367,28 @@ class EnhancedMCPClient:
 
         return parsed_result
 
+    async def _find_first(self, probes: List[Tuple[str, str]]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """Try each (strategy, value) probe in priority order and return the first one that finds an element.
+
+        Returns (strategy, value, parsed result), or None when every probe misses. Probes are sent one
+        at a time on purpose: the server runs finds serially (with an implicit wait on web sessions),
+        so a batch would pay for every miss even when the first probe succeeds.
+        """
+        for strategy, value in probes:
+            logger.debug("🔄 Trying %s: %s", strategy, value)
+            try:
+                parsed_result = await self._find_cached(strategy, value)
+            except Exception as e:
+                logger.warning("⚠️ %s %s failed: %s", strategy, value, e)
+                continue
+            if parsed_result.get('status') == 'success' and parsed_result.get('element_id'):
+                return strategy, value, parsed_result
+        return None
+
     async def recover_name_cell_text(self) -> Dict[str, Any]:
         """Try to recover text by finding Name cell directly."""
         try:
-            print("🔄 Attempting to find Name cell directly...")
+            logger.info("🔄 Attempting to find Name cell directly...")
         
             # Find Name cell using accessibility_id
             find_result = await self.call_tool("appium_find_element", {
@@ -682,31 +1421,18 @@ class EnhancedMCPClient:
             return {"status": "error", "message": "Name cell recovery failed"}
         
         except Exception as e:
-            print(f"⚠️ Name cell recovery error: {e}")
+            logger.warning("⚠️ Name cell recovery error: %s", e)
             return {"status": "error", "message": f"Name cell recovery failed: {str(e)}"}
 
     async def recover_text_via_xpath(self) -> Dict[str, Any]:
         """Try to recover text using XPath strategies."""
         try:
-            print("🔄 Attempting XPath-based recovery...")
-        
-            xpath_strategies = [
-            "//XCUIElementTypeCell[@name='Name']//XCUIElementTypeStaticText[2]",
-            "//XCUIElementTypeStaticText[@name='Name']/following-sibling::XCUIElementTypeStaticText[1]",
-            "//XCUIElementTypeCell[.//XCUIElementTypeStaticText[@name='Name']]//XCUIElementTypeStaticText[position()>1]",
-            "//*[@name='Name']/..//XCUIElementTypeStaticText[not(@name='Name')]"
-            ]
+            logger.info("🔄 Attempting XPath-based recovery...")
         
-            for xpath in xpath_strategies:
+            # Try each XPath in priority order; later finds are skipped once one yields text
+            for xpath in NAME_CELL_XPATHS:
                 try:
-                    print(f"🔄 Trying XPath: {xpath}")
-                
-                    find_result = await self.call_tool("appium_find_element", {
-                    "strategy": "xpath",
-                    "value": xpath
-                    })
-                
-                    parsed_find = self.parse_tool_result(find_result)
+                    parsed_find = await self._find_cached("xpath", xpath)
                     if parsed_find.get("status") == "success":
                         xpath_element_id = parsed_find.get("element_id")
                     
@@ -726,60 +1452,46 @@ class EnhancedMCPClient:
                                 "xpath_used": xpath
                              }
                 except Exception as e:
-                    print(f"⚠️ XPath {xpath} failed: {e}")
+                    logger.warning("⚠️ XPath %s failed: %s", xpath, e)
                     continue
         
             return {"status": "error", "message": "All XPath strategies failed"}
         
         except Exception as e:
-            print(f"⚠️ XPath recovery error: {e}")
+            logger.warning("⚠️ XPath recovery error: %s", e)
             return {"status": "error", "message": f"XPath recovery failed: {str(e)}"}
 
     async def recover_text_via_page_source(self) -> Dict[str, Any]:
         """Try to recover text by parsing page source."""
         try:
-            print("🔄 Attempting page source parsing recovery...")
+            logger.info("🔄 Attempting page source parsing recovery...")
         
             # Get current page source
-            page_result = await self.call_tool("appium_get_page_source", {"full": False})
-            parsed_page = self.parse_tool_result(page_result)
+            parsed_page = await self._cached_page_source()
         
             if parsed_page.get("status") == "success":
                 page_source = parsed_page.get("page_source", "")
             
-                import re
-            
                 # Generic patterns to find Name cell value
-                patterns = [
-                r'name=["\']Name["\'][^>]*>.*?name=["\']([^"\']+)["\']',
-                r'label=["\']Name["\'][^>]*>.*?value=["\']([^"\']+)["\']',
-                r'<[^>]*name=["\']Name["\'][^>]*>.*?<[^>]*>([^<]+)</[^>]*>',
-                r'Name.*?<[^>]*>([^<]+)</[^>]*>'
-                ]
-            
-                for pattern in patterns:
-                    try:
-                        match = re.search(pattern, page_source, re.IGNORECASE | re.DOTALL)
-                        if match:
-                            found_text = match.group(1).strip()
-                        
-                            # Return any meaningful text that's not just "Name"
-                            if found_text and found_text != "Name":
-                                return {
-                                "status": "success",
-                                "text": found_text,
-                                "message": f"Recovered text via page source: {found_text}",
-                                "method": "page_source_recovery",
-                                "pattern_used": pattern
-                                }
-                    except Exception as pattern_error:
-                        print(f"⚠️ Pattern {pattern} failed: {pattern_error}")
-                        continue
+                for pattern in NAME_RECOVERY_PATTERNS:
+                    match = pattern.search(page_source)
+                    if match:
+                        found_text = match.group(1).strip()
+                    
+                        # Return any meaningful text that's not just "Name"
+                        if found_text and found_text != "Name":
+                            return {
+                            "status": "success",
+                            "text": found_text,
+                            "message": f"Recovered text via page source: {found_text}",
+                            "method": "page_source_recovery",
+                            "pattern_used": pattern.pattern
+                            }
         
             return {"status": "error", "message": "Page source parsing failed"}
         
         except Exception as e:
-            print(f"⚠️ Page source recovery error: {e}")
+            logger.warning("⚠️ Page source recovery error: %s", e)
             return {"status": "error", "message": f"Page source recovery failed: {str(e)}"}
 
 
@@ -787,35 +1499,21 @@ class EnhancedMCPClient:
     async def smart_input_text(self, text: str, element_id: str = None) -> Dict[str, Any]:
         """Smart input text with automatic element resolution."""
         
-        # ENHANCED: Handle Gemini's generic element ID patterns
-        invalid_patterns = [
-            "element_id_from_previous_step", 
-            "previous_element_id", 
-            "found_element_id",
-            "current_element_id",
-            "last_element_id",
-            "element_from_previous_step",
-            "previous_element",
-            None,
-            "",
-            "null"
-        ]
-    
-        # If element_id is invalid or not provided, use the last found element
-        if element_id in invalid_patterns:
-            element_id = self.last_element_id
-            print(f"🔄 Using last found element ID: {element_id}")
-        elif not element_id:
-            element_id = self.last_element_id
+        # ENHANCED: Handle Gemini's generic element ID patterns, using the last found element
+        # when element_id is invalid or not provided
+        if element_id is not None and not isinstance(element_id, str):
+            # Don't fall through to typing into whatever has focus
+            return {"status": "error", "message": f"Invalid element ID for input text: {element_id!r}"}
+        element_id = self._resolve_element_id(element_id)
         
         if element_id:
-            print(f"⌨️  Inputting text to element {element_id}: '{text}'")
+            logger.info("⌨️  Inputting text to element %s: '%s'", element_id, text)
             result = await self.call_tool("appium_input_text", {
                 "element_id": element_id,
                 "text": text
             })
         else:
-            print(f"⌨️  Inputting text directly: '{text}'")
+            logger.info("⌨️  Inputting text directly: '%s'", text)
             result = await self.call_tool("appium_input_text", {"text": text})
         
         return self.parse_tool_result(result)
@@ -823,7 +1521,7 @@ class EnhancedMCPClient:
     async def scroll_to_find_element(self, strategy: str, value: str, max_scrolls: int = 5) -> Tuple[Optional[str], Dict[str, Any]]:
         """Scroll and try to find element."""
         for i in range(max_scrolls):
-            print(f"🔄 Scroll attempt {i+1}/{max_scrolls}")
+            logger.info("🔄 Scroll attempt %s/%s", i+1, max_scrolls)
             
             # Try to find element first
             element_id, result = await self.smart_find_element(strategy, value)
@@ -848,34 +1546,53 @@ class EnhancedMCPClient:
     
     async def quit_session(self) -> Dict[str, Any]:
         """Quit session using your existing server."""
-        print("🔚 Quitting session")
+        logger.info("🔚 Quitting session")
         result = await self.call_tool("appium_quit_session", {})
         self.session_active = False
         self.current_platform = None
         self.element_store.clear()
+        self._miss_cache.clear()
+        self._locator_index.clear()
+        self._web_context_cached = None
         return self.parse_tool_result(result)
     
     async def _is_web_context(self) -> bool:
-        """Check if we're in Safari web context by looking at page source."""
+        """Check if we're in Safari web context (resolved once per session).
+
+        Asks the server for the current context; falls back to probing the page source for HTML.
+        """
+        if self._web_context_cached is not None:
+            return self._web_context_cached
+        
         try:
-            page_source_result = await self.call_tool("appium_get_page_source", {"full": False})
-            parsed_result = self.parse_tool_result(page_source_result)
+            contexts_result = await self.call_tool("appium_get_contexts", {})
+            parsed_result = self.parse_tool_result(contexts_result)
+            if parsed_result.get('status') == 'success':
+                current_context = parsed_result.get('current_context') or ''
+                self._web_context_cached = current_context.startswith(('WEBVIEW', 'CHROMIUM'))
+                return self._web_context_cached
+        except Exception:
+            pass
+        
+        try:
+            parsed_result = await self._cached_page_source()
             if parsed_result.get('status') == 'success':
                 source = parsed_result.get('page_source', '')
             # If it contains HTML tags, we're in web context
-                return '<html' in source or '<body' in source
-        except:
-            pass
+                self._web_context_cached = '<html' in source or '<body' in source
+                return self._web_context_cached
+        except Exception as e:
+            logger.debug("Page-source web context probe failed: %s", e)
         return False
     
     
     async def _find_web_element(self, strategy: str, value: str, description: str = None) -> Tuple[Optional[str], Dict[str, Any]]:
         """Intelligent web element finder that adapts to any website."""
-        print(f"🌐 Web context detected, using intelligent strategies for: {value}")
+        logger.info("🌐 Web context detected, using intelligent strategies for: %s", value)
 
         # Extract actual text content if value is an XPath
         target_text = self._extract_text_from_xpath_or_value(value)
-        print(f"🎯 Extracted target text: '{target_text}'")
+        logger.debug("🎯 Extracted target text: '%s'", target_text)
     
         # STEP 1: Try original strategy first (if provided)
         web_strategies = []
@@ -886,296 +1603,125 @@ class EnhancedMCPClient:
         target_lower = target_text.lower().strip()
     
         # STEP 3: Build smart strategies based on semantic meaning
-        smart_strategies = await self._build_smart_strategies(target_lower, target_text)
+        smart_strategies = self._build_smart_strategies(target_lower, target_text)
         web_strategies.extend(smart_strategies)
     
         # STEP 4: Add your original fallback strategies
         web_strategies.extend([
             ("link text", target_text),
             ("partial link text", target_text),
-            ("xpath", f"//a[contains(text(), '{target_text}')]"),
-            ("xpath", f"//*[contains(text(), '{target_text}')]"),
+            ("xpath", f"//a[contains(text(), {xpath_literal(target_text)})]"),
+            ("xpath", f"//*[contains(text(), {xpath_literal(target_text)})]"),
             ("xpath", value)  # Original XPath as final fallback
         ])
     
-        # STEP 5: Try each strategy intelligently
-        for i, (web_strategy, web_value) in enumerate(web_strategies):
-            try:
-                print(f"🔍 Trying intelligent strategy {i+1}/{len(web_strategies)}: {web_strategy}='{web_value}'")
-                result = await self.call_tool("appium_find_element", {
-                 "strategy": web_strategy,
-                    "value": web_value
-                })
-        
-                parsed_result = self.parse_tool_result(result)
-                if parsed_result.get('status') == 'success':
-                    element_id = parsed_result.get('element_id')
-                    if element_id:
-                        self.last_element_id = element_id
-                        print(f"✅ Found web element using {web_strategy}: {element_id}")
-                        return element_id, parsed_result
-            except Exception as e:
-                print(f"⚠️ Strategy {web_strategy} failed: {e}")
-                continue
+        # STEP 5: Try the strategies in priority order - each miss costs the session's implicit wait,
+        # so stop at the first one that finds an element
+        found = await self._find_first(list(dict.fromkeys(web_strategies)))
+        if found is not None:
+            web_strategy, _, parsed_result = found
+            element_id = parsed_result['element_id']
+            self.last_element_id = element_id
+            logger.info("✅ Found web element using %s: %s", web_strategy, element_id)
+            return element_id, parsed_result
 
         # STEP 6: If all strategies fail, try page inspection approach
-        print("🔍 All direct strategies failed, trying page inspection...")
+        logger.info("🔍 All direct strategies failed, trying page inspection...")
         return await self._find_web_element_by_inspection(target_text, target_lower)
     
+    async def _find_web_element_by_inspection(self, target_text: str, target_lower: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Find a web element from locators built by analyzing the page's HTML source."""
+        parsed_page = await self._cached_page_source(full=True)
+        if parsed_page.get('status') != 'success' or not parsed_page.get('page_source'):
+            return None, {"status": "error", "message": f"Could not find web element '{target_text}' (page source unavailable)"}
+        
+        candidates = self._analyze_html_for_candidates(parsed_page['page_source'], target_text, target_lower)
+        found = await self._find_first(list(dict.fromkeys(candidates)))
+        if found is not None:
+            candidate_strategy, candidate_value, parsed_result = found
+            element_id = parsed_result['element_id']
+            self.last_element_id = element_id
+            logger.info("✅ Found web element via page inspection using %s %s: %s",
+                        candidate_strategy, candidate_value, element_id)
+            return element_id, parsed_result
+        
+        return None, {
+            "status": "error",
+            "message": f"Could not find web element '{target_text}' with any strategy",
+            "candidates_tried": len(candidates)
+        }
 
     def _analyze_html_for_candidates(self, html_source: str, target_text: str, target_lower: str) -> List[Tuple[str, str]]:
         """Analyze HTML source to find potential element candidates."""
-        import re
         candidates = []
     
-        # Look for input fields with relevant attributes
-        input_patterns = [
-            r'<input[^>]*id=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<input[^>]*name=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<input[^>]*class=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<input[^>]*placeholder=["\']([^"\']*(?:' + re.escape(target_text) + r')[^"\']*)["\']',
-        ]
-    
-        # Look for buttons with relevant attributes
-        button_patterns = [
-            r'<button[^>]*id=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<button[^>]*class=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<input[^>]*type=["\']submit["\'][^>]*value=["\']([^"\']*(?:' + re.escape(target_text) + r')[^"\']*)["\']',
-        ]
-    
-        # Look for links with relevant attributes
-        link_patterns = [
-            r'<a[^>]*id=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-            r'<a[^>]*class=["\']([^"\']*(?:' + re.escape(target_lower) + r')[^"\']*)["\']',
-        ]
-    
-        # Search for input field candidates
-        for pattern in input_patterns:
-            matches = re.findall(pattern, html_source, re.IGNORECASE)
-            for match in matches:
-                if 'id=' in pattern:
-                    candidates.append(("id", match))
-                elif 'name=' in pattern:
-                    candidates.append(("name", match))
-                elif 'class=' in pattern:
-                    candidates.append(("xpath", f"//*[contains(@class, '{match}')]"))
-    
-        # Search for button candidates
-        for pattern in button_patterns:
-            matches = re.findall(pattern, html_source, re.IGNORECASE)
-            for match in matches:
-                if 'id=' in pattern:
-                    candidates.append(("id", match))
-                elif 'class=' in pattern:
-                    candidates.append(("xpath", f"//*[contains(@class, '{match}')]"))
-                elif 'value=' in pattern:
-                    candidates.append(("xpath", f"//input[@value='{match}']"))
-    
-        # Search for link candidates
-        for pattern in link_patterns:
-            matches = re.findall(pattern, html_source, re.IGNORECASE)
-            for match in matches:
-                if 'id=' in pattern:
+        # Look for input fields, buttons and links with relevant attributes - compiled XPath over the
+        # parsed tree when lxml can parse the page, the regex patterns otherwise
+        html_dom = self._html_dom(html_source)
+        if html_dom is not None:
+            matches_by_kind = ((kind, xpath(html_dom, needle=target_lower)) for xpath, kind in HTML_CANDIDATE_XPATHS)
+        else:
+            matches_by_kind = ((kind, pattern.findall(html_source))
+                               for pattern, kind in html_candidate_patterns(target_text, target_lower))
+        
+        for kind, matches in matches_by_kind:
+            for match in map(str, matches):
+                if kind == "id":
                     candidates.append(("id", match))
-                elif 'class=' in pattern:
-                    candidates.append(("xpath", f"//*[contains(@class, '{match}')]"))
+                elif kind == "name":
+                    # The server has no "name" strategy, so match the attribute with CSS
+                    candidates.append(("css_selector", f"[name={css_literal(match)}]"))
+                elif kind == "class":
+                    candidates.append(("css_selector", f"[class*={css_literal(match)}]"))
+                else:
+                    candidates.append(("css_selector", f"input[value={css_literal(match)}]"))
     
-        print(f"🔍 Page analysis found {len(candidates)} potential candidates")
+        logger.debug("🔍 Page analysis found %s potential candidates", len(candidates))
         return candidates
     
-    async def _build_smart_strategies(self, target_lower: str, target_text: str) -> List[Tuple[str, str]]:
+    def _html_dom(self, html_source: str):
+        """Parse html_source with lxml.html, reusing the tree for the same source string.
+
+        Returns None when lxml is not installed or the source cannot be parsed.
+        """
+        if not HTML_CANDIDATE_XPATHS or not html_source:
+            return None
+        if self._html_dom_cache is not None and self._html_dom_cache[0] is html_source:
+            return self._html_dom_cache[1]
+        try:
+            html_dom = lxml_html.fromstring(html_source)
+        except (ET.ParseError, ET.ParserError, ValueError) as e:
+            logger.debug("lxml could not parse page source, using regex candidates: %s", e)
+            html_dom = None
+        self._html_dom_cache = (html_source, html_dom)
+        return html_dom
+    
+    def _build_smart_strategies(self, target_lower: str, target_text: str) -> List[Tuple[str, str]]:
         """Build intelligent strategies based on semantic analysis."""
-        strategies = []
-    
-        # USERNAME/EMAIL FIELD DETECTION
-        username_keywords = ['username', 'user', 'email', 'login', 'account', 'userid', 'user_name', 'user-name']
-        if any(keyword in target_lower for keyword in username_keywords):
-            strategies.extend([
-                # Common ID patterns
-                ("id", "username"), ("id", "user"), ("id", "email"), ("id", "login"),
-                ("id", "user-name"), ("id", "user_name"), ("id", "userid"), ("id", "account"),
-                # Common name patterns
-                ("name", "username"), ("name", "user"), ("name", "email"), ("name", "login"),
-                ("name", "user-name"), ("name", "user_name"), ("name", "userid"),
-                # Input type and placeholder patterns
-                ("xpath", "//input[@type='text'][1]"),  # First text input
-                ("xpath", "//input[@type='email']"),     # Email input type
-                ("xpath", "//input[contains(@placeholder, 'username') or contains(@placeholder, 'user') or contains(@placeholder, 'email') or contains(@placeholder, 'login')]"),
-                # Data attribute patterns
-                ("xpath", "//input[contains(@data-test, 'username') or contains(@data-test, 'user') or contains(@data-test, 'login')]"),
-                ("xpath", "//input[contains(@data-testid, 'username') or contains(@data-testid, 'user') or contains(@data-testid, 'login')]"),
-                # Class patterns
-                ("xpath", "//input[contains(@class, 'username') or contains(@class, 'user') or contains(@class, 'email') or contains(@class, 'login')]"),
-            ])
-    
-        # PASSWORD FIELD DETECTION
-        password_keywords = ['password', 'pass', 'pwd', 'passcode', 'passphrase']
-        if any(keyword in target_lower for keyword in password_keywords):
-            strategies.extend([
-                # Common ID patterns
-                ("id", "password"), ("id", "pass"), ("id", "pwd"), ("id", "passcode"),
-                # Common name patterns  
-                ("name", "password"), ("name", "pass"), ("name", "pwd"), ("name", "passcode"),
-                # Password input type (most reliable)
-                ("xpath", "//input[@type='password']"),
-                # Placeholder patterns
-                ("xpath", "//input[contains(@placeholder, 'password') or contains(@placeholder, 'pass')]"),
-                # Data attribute patterns
-                ("xpath", "//input[contains(@data-test, 'password') or contains(@data-test, 'pass')]"),
-                ("xpath", "//input[contains(@data-testid, 'password') or contains(@data-testid, 'pass')]"),
-                # Class patterns
-                ("xpath", "//input[contains(@class, 'password') or contains(@class, 'pass')]"),
-            ])
-    
-        # BUTTON/SUBMIT DETECTION
-        button_keywords = ['login', 'submit', 'sign in', 'log in', 'continue', 'next', 'enter', 'go', 'send', 'confirm']
-        if any(keyword in target_lower for keyword in button_keywords):
-            # Try common button IDs first
-            button_ids = ['login', 'submit', 'signin', 'login-button', 'submit-button', 'continue', 'next', 'send']
-            for btn_id in button_ids:
-                strategies.append(("id", btn_id))
-                strategies.append(("name", btn_id))
-        
-            strategies.extend([
-                #Submit input buttons
-                ("xpath", "//input[@type='submit']"),
-                ("xpath", "//button[@type='submit']"),
-                # Value-based detection
-                ("xpath", f"//input[@value='{target_text}' or contains(@value, '{target_lower}')]"),
-                ("xpath", f"//button[text()='{target_text}' or contains(text(), '{target_text}')]"),
-                # Generic button patterns
-                ("xpath", "//button[contains(@class, 'btn') or contains(@class, 'button')]"),
-                ("xpath", f"//button[contains(@class, '{target_lower}')]"),
-                # Data attribute patterns
-                ("xpath", f"//button[contains(@data-test, '{target_lower}') or contains(@data-testid, '{target_lower}')]"),
-                ("xpath", f"//input[contains(@data-test, '{target_lower}') or contains(@data-testid, '{target_lower}')]"),
-            ])
-    
-        # LINK DETECTION
-        link_keywords = ['logout', 'sign out', 'log out', 'exit', 'quit', 'home', 'back', 'menu', 'settings']
-        if any(keyword in target_lower for keyword in link_keywords):
-            strategies.extend([
-                # Direct link text
-                ("link text", target_text),
-                ("partial link text", target_text),
-                # ID-based links
-                ("id", target_lower), ("id", target_lower.replace(' ', '-')), ("id", target_lower.replace(' ', '_')),
-                # Link patterns
-                ("xpath", f"//a[contains(text(), '{target_text}') or @title='{target_text}']"),
-                ("xpath", f"//a[contains(@href, '{target_lower}') or contains(@class, '{target_lower}')]"),
-                # Data attribute patterns
-                ("xpath", f"//a[contains(@data-test, '{target_lower}') or contains(@data-testid, '{target_lower}')]"),
-            ])
-    
-        # MENU/NAVIGATION DETECTION
-        menu_keywords = ['menu', 'hamburger', 'burger', 'nav', 'navigation', 'toggle']
-        if any(keyword in target_lower for keyword in menu_keywords):
-            strategies.extend([
-                # Common menu IDs
-                ("id", "menu"), ("id", "nav"), ("id", "hamburger"), ("id", "burger"), ("id", "toggle"),
-                ("id", "menu-button"), ("id", "nav-button"), ("id", "menu-toggle"),
-                # Class-based detection
-                ("xpath", "//button[contains(@class, 'menu') or contains(@class, 'burger') or contains(@class, 'hamburger')]"),
-                ("xpath", "//div[contains(@class, 'menu') or contains(@class, 'burger') or contains(@class, 'hamburger')]"),
-                # Icon patterns (common in modern web)
-                ("xpath", "//button[contains(@class, 'icon') and (contains(@class, 'menu') or contains(@aria-label, 'menu'))]"),
-                # ARIA patterns
-                ("xpath", "//button[@aria-label='Menu' or @aria-label='Open menu' or contains(@aria-label, 'menu')]"),
-            ])
-    
-        # GENERIC TEXT/ELEMENT DETECTION (for anything else)
-        else:
-            # Try common patterns for any text
-            safe_text = target_lower.replace(' ', '-')
-            safe_text_underscore = target_lower.replace(' ', '_')
-        
-            strategies.extend([
-                # ID patterns
-                ("id", target_lower), ("id", safe_text), ("id", safe_text_underscore),
-                # Name patterns
-                ("name", target_lower), ("name", safe_text), ("name", safe_text_underscore),
-                # Class patterns
-                ("xpath", f"//*[contains(@class, '{target_lower}') or contains(@class, '{safe_text}')]"),
-                # Data patterns
-                ("xpath", f"//*[contains(@data-test, '{target_lower}') or contains(@data-testid, '{target_lower}')]"),
-                # Generic text content
-                ("xpath", f"//*[contains(text(), '{target_text}') or @title='{target_text}' or @alt='{target_text}']"),
-            ])
-    
-        return strategies
+        return list(smart_web_strategies(target_lower, target_text))
     
     def _extract_text_from_xpath_or_value(self, value: str) -> str:
         """Intelligently extract meaningful text from any input format."""
-        import re
-    
         # STEP 1: If it's already clean text (no special characters), return as-is
-        if not any(char in value for char in ['@', '/', '[', ']', '(', ')', '"', "'"]):
+        if not XPATH_SPECIAL_CHARS_PATTERN.search(value):
             return value.strip()
     
-        # STEP 2: XPath and attribute patterns (ordered by reliability)
-        patterns = [
-            # Web-specific HTML attributes (most reliable for web)
-            r"@id\s*=\s*['\"]([^'\"]+)['\"]",                 # @id='value'
-            r"@name\s*=\s*['\"]([^'\"]+)['\"]",               # @name='value'  
-            r"@class\s*=\s*['\"]([^'\"]+)['\"]",              # @class='value'
-            r"@data-test\s*=\s*['\"]([^'\"]+)['\"]",          # @data-test='value'
-            r"@data-testid\s*=\s*['\"]([^'\"]+)['\"]",        # @data-testid='value'
-            r"@placeholder\s*=\s*['\"]([^'\"]+)['\"]",        # @placeholder='value'
-            r"@value\s*=\s*['\"]([^'\"]+)['\"]",              # @value='value'
-            r"@type\s*=\s*['\"]([^'\"]+)['\"]",               # @type='value'
-            r"@href\s*=\s*['\"]([^'\"]+)['\"]",               # @href='value'
-            r"@title\s*=\s*['\"]([^'\"]+)['\"]",              # @title='value'
-            r"@alt\s*=\s*['\"]([^'\"]+)['\"]",                # @alt='value'
-        
-            # Mobile app attributes (for native contexts)
-            r"@text\s*=\s*['\"]([^'\"]+)['\"]",               # @text='value'
-            r"@label\s*=\s*['\"]([^'\"]+)['\"]",              # @label='value'
-            r"@name\s*=\s*['\"]([^'\"]+)['\"]",               # @name='value' (iOS)
-            r"@content-desc\s*=\s*['\"]([^'\"]+)['\"]",       # @content-desc='value' (Android)
-            r"@resource-id\s*=\s*['\"]([^'\"]+)['\"]",        # @resource-id='value' (Android)
-        
-            # XPath text functions
-            r"contains\(text\(\),\s*['\"]([^'\"]+)['\"]",     # contains(text(), 'value')
-            r"text\(\)\s*=\s*['\"]([^'\"]+)['\"]",            # text()='value'
-            r"normalize-space\(text\(\)\)\s*=\s*['\"]([^'\"]+)['\"]",  # normalize-space(text())='value'
-        
-            # XPath attribute contains functions
-            r"contains\(@text,\s*['\"]([^'\"]+)['\"]",        # contains(@text, 'value')
-            r"contains\(@label,\s*['\"]([^'\"]+)['\"]",       # contains(@label, 'value')
-            r"contains\(@name,\s*['\"]([^'\"]+)['\"]",        # contains(@name, 'value')
-            r"contains\(@class,\s*['\"]([^'\"]+)['\"]",       # contains(@class, 'value')
-            r"contains\(@id,\s*['\"]([^'\"]+)['\"]",          # contains(@id, 'value')
-            r"contains\(@data-test,\s*['\"]([^'\"]+)['\"]",   # contains(@data-test, 'value')
-            r"contains\(@placeholder,\s*['\"]([^'\"]+)['\"]", # contains(@placeholder, 'value')
-        
-            # Generic quoted text (fallback)
-            r"'([^']+)'",                                     # Any single-quoted text
-            r'"([^"]+)"'                                      # Any double-quoted text
-        ]
-
-    # STEP 3: Try each pattern and return the first meaningful match
-        for i, pattern in enumerate(patterns):
-            matches = re.findall(pattern, value, re.IGNORECASE)
-            print(f"📋 Pattern {i+1} ({pattern[:50]}...): {matches}")
-    
-            # Return the first non-empty, meaningful match
-            for match in matches:
-                clean_match = match.strip()
-                if clean_match and len(clean_match) > 0:
-                    # Filter out obviously non-meaningful matches
-                    if not self._is_meaningful_text(clean_match):
-                        continue
-                    
-                    print(f"✅ Pattern {i+1} extracted meaningful text: '{clean_match}'")
-                    return clean_match
+        # STEP 2: XPath and attribute patterns (ordered by reliability) - see xpath_text_candidates
+        # STEP 3: Return the first non-empty, meaningful match
+        for match in xpath_text_candidates(value):
+            clean_match = match.strip()
+            # Filter out obviously non-meaningful matches
+            if clean_match and self._is_meaningful_text(clean_match):
+                logger.debug("✅ Pattern extracted meaningful text: '%s'", clean_match)
+                return clean_match
 
         # STEP 4: If no pattern worked, try intelligent parsing
         intelligent_result = self._intelligent_text_parsing(value)
         if intelligent_result != value:
-            print(f"✅ Intelligent parsing extracted: '{intelligent_result}'")
+            logger.debug("✅ Intelligent parsing extracted: '%s'", intelligent_result)
             return intelligent_result
 
-        print(f"❌ No extraction worked, using original value: '{value}'")
+        logger.debug("❌ No extraction worked, using original value: '%s'", value)
         return value
 
     def _is_meaningful_text(self, text: str) -> bool:
@@ -1183,31 +1729,14 @@ class EnhancedMCPClient:
         text_lower = text.lower()
     
         # Filter out obviously technical/non-meaningful values
-        technical_patterns = [
-            r'^[a-f0-9]{8,}$',          # Long hex strings
-            r'^[0-9]{8,}$',             # Long numeric IDs
-            r'^[a-z0-9_-]{20,}$',       # Long technical identifiers
-            r'^\w+\.\w+\.\w+',          # Package-like names (com.example.app)
-        ]
-    
-        for pattern in technical_patterns:
-            if re.match(pattern, text_lower):
-                return False
-    
-        # Consider it meaningful if it contains common UI words
-        meaningful_keywords = [
-            'username', 'password', 'login', 'email', 'submit', 'button',
-            'menu', 'logout', 'sign', 'user', 'pass', 'name', 'text',
-            'search', 'click', 'tap', 'press', 'next', 'back', 'home',
-            'settings', 'profile', 'account', 'continue', 'cancel', 'ok'
-        ]
+        if TECHNICAL_TEXT_PATTERN.match(text_lower):
+            return False
     
-        return any(keyword in text_lower for keyword in meaningful_keywords) or len(text) <= 15
+        # Short values are always kept; only longer ones need a common UI word
+        return len(text) <= 15 or any(keyword in text_lower for keyword in MEANINGFUL_TEXT_KEYWORDS)
 
     def _intelligent_text_parsing(self, value: str) -> str:
-        """Last resort: intelligent parsing of complex XPath or selectors."""
-        import re
-    
+        """Last resort: intelligent parsing of complex XPath or selectors."""    
         # Try to extract the most meaningful part from complex expressions
     
         # 1. If it's a complex XPath, try to get the most specific part
@@ -1216,7 +1745,7 @@ class EnhancedMCPClient:
             parts = value.split('//')[-1]  # Get the last part after //
             if '[' in parts:
                 # Try to extract meaningful text from conditions
-                condition_text = re.search(r'\[([^\]]+)\]', parts)
+                condition_text = XPATH_CONDITION_PATTERN.search(parts)
                 if condition_text:
                     return self._extract_text_from_xpath_or_value(condition_text.group(1))
     
@@ -1229,7 +1758,7 @@ class EnhancedMCPClient:
                     return potential_value
     
         # 3. Extract words that look like UI elements
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', value)
+        words = UI_WORD_PATTERN.findall(value)
         meaningful_words = [word for word in words if self._is_meaningful_text(word)]
     
         if meaningful_words:
@@ -1237,205 +1766,99 @@ class EnhancedMCPClient:
     
         return value  # Return original if nothing else works
     
-    async def _get_page_fingerprint(self) -> Dict[str, Any]:
-        """Get a generic fingerprint of the current page state."""
+    async def _get_page_fingerprint(self, max_age: float = PAGE_SOURCE_TTL) -> Dict[str, Any]:
+        """Get a generic fingerprint of the current page state: the page source's length and content hash.
+
+        The page source comes through _cached_page_source. Returns {} when it cannot be fetched.
+        """
         try:
-            result = await self.call_tool("appium_get_page_source", {"full": False})
-            parsed_result = self.parse_tool_result(result)
+            parsed_result = await self._cached_page_source(max_age=max_age)
         
             if parsed_result.get('status') == 'success':
                 page_source = parsed_result.get('page_source', '')
-            
-                # Generic page fingerprint - not specific to any site
                 fingerprint = {
                     'source_length': len(page_source),
-                    'source_hash': hash(page_source),  # Simple content hash
-                    'element_count': self._count_elements(page_source),
-                    'form_count': page_source.lower().count('<form'),
-                    'button_count': page_source.lower().count('<button') + page_source.lower().count('type="submit"'),
-                    'link_count': page_source.lower().count('<a href'),
-                    'input_count': page_source.lower().count('<input'),
-                    'title': self._extract_title(page_source),
-                    'has_forms': '<form' in page_source.lower(),
-                    'has_navigation': any(nav in page_source.lower() for nav in ['nav', 'menu', 'header']),
-                    'unique_ids': self._extract_unique_ids(page_source),
-                    'unique_classes': self._extract_unique_classes(page_source),
-                    'text_snippets': self._extract_text_snippets(page_source)
+                    'source_hash': _source_hash(page_source)  # Stable 64-bit content hash
                 }
-            
-                print(f"📊 Page fingerprint: elements={fingerprint['element_count']}, hash={abs(fingerprint['source_hash']) % 10000}")
+                logger.debug("📊 Page fingerprint: length=%s, hash=%s", fingerprint['source_length'], fingerprint['source_hash'] % 10000)
                 return fingerprint
         
         except Exception as e:
-            print(f"⚠️ Error getting page fingerprint: {e}")
+            logger.warning("⚠️ Error getting page fingerprint: %s", e)
     
         return {}
     
-    def _count_elements(self, page_source: str) -> int:
-        """Count total HTML elements in page."""
-        import re
-        # Count opening tags
-        tags = re.findall(r'<[^/!][^>]*>', page_source)
-        return len(tags)
-
-    def _extract_unique_ids(self, page_source: str) -> List[str]:
-        """Extract unique element IDs from page."""
-        import re
-        ids = re.findall(r'id=["\']([^"\']+)["\']', page_source, re.IGNORECASE)
-        return list(set(ids))[:10]  # Limit to first 10 unique IDs
-
-    def _extract_unique_classes(self, page_source: str) -> List[str]:
-        """Extract unique CSS classes from page."""
-        import re
-        classes = re.findall(r'class=["\']([^"\']+)["\']', page_source, re.IGNORECASE)
-        all_classes = []
-        for class_attr in classes:
-            all_classes.extend(class_attr.split())
-        return list(set(all_classes))[:10]  # Limit to first 10 unique classes
-    
-    def _extract_text_snippets(self, page_source: str) -> List[str]:
-        """Extract meaningful text snippets from page."""
-        import re
-        # Remove scripts and styles
-        clean_source = re.sub(r'<script[^>]*>.*?</script>', '', page_source, flags=re.DOTALL)
-        clean_source = re.sub(r'<style[^>]*>.*?</style>', '', clean_source, flags=re.DOTALL)
-    
-        # Extract text content
-        text_content = re.sub(r'<[^>]+>', ' ', clean_source)
-        words = text_content.split()
-    
-        # Get meaningful words (longer than 2 chars, not all numbers)
-        meaningful_words = [w for w in words if len(w) > 2 and not w.isdigit() and w.isalnum()]
-        return meaningful_words[:20]  # Limit to first 20 words
-
-    def _extract_title(self, page_source: str) -> str:
-        """Extract page title."""
-        import re
-        title_match = re.search(r'<title[^>]*>([^<]+)</title>', page_source, re.IGNORECASE)
-        return title_match.group(1).strip() if title_match else ""
-
     def _did_page_change(self, before: Dict, after: Dict) -> bool:
         """Generic method to detect if page changed meaningfully."""
     
         if not before or not after:
-            print("⚠️ Missing fingerprint data")
+            logger.info("⚠️ Missing fingerprint data")
             return False
     
-        # Check 1: Content hash changed significantly
-        if before.get('source_hash') != after.get('source_hash'):
-            print("🎯 Page content hash changed!")
-            return True
-    
-        # Check 2: Element count changed significantly (>10% change)
-        before_count = before.get('element_count', 0)
-        after_count = after.get('element_count', 0)
-    
-        if before_count > 0:
-            change_percent = abs(before_count - after_count) / before_count
-            if change_percent > 0.1:  # 10% change in element count
-                print(f"🎯 Element count changed significantly: {before_count} → {after_count}")
-                return True
-    
-        # Check 3: Page title changed
-        if before.get('title') != after.get('title'):
-            print(f"🎯 Page title changed: '{before.get('title')}' → '{after.get('title')}'")
-            return True
-    
-        # Check 4: Form count changed (forms appeared/disappeared)
-        if before.get('form_count') != after.get('form_count'):
-            print(f"🎯 Form count changed: {before.get('form_count')} → {after.get('form_count')}")
+        # Content hash or size changed (a 64-bit hash collision would also need equal lengths).
+        # Any other page property is derived from the same source, so it cannot differ when both match.
+        if (before.get('source_hash') != after.get('source_hash')
+                or before.get('source_length') != after.get('source_length')):
+            logger.info("🎯 Page content hash changed!")
             return True
     
-        # Check 5: Button count changed significantly
-        before_buttons = before.get('button_count', 0)
-        after_buttons = after.get('button_count', 0)
-        if abs(before_buttons - after_buttons) > 2:  # More than 2 buttons difference
-            print(f"🎯 Button count changed: {before_buttons} → {after_buttons}")
-            return True
-    
-        # Check 6: Unique IDs changed
-        before_ids = set(before.get('unique_ids', []))
-        after_ids = set(after.get('unique_ids', []))
-        new_ids = after_ids - before_ids
-        removed_ids = before_ids - after_ids
-    
-        if len(new_ids) > 2 or len(removed_ids) > 2:
-            print(f"🎯 Significant ID changes: +{len(new_ids)} -{len(removed_ids)}")
-            return True
-    
-        # Check 7: Text content changed significantly
-        before_text = set(before.get('text_snippets', []))
-        after_text = set(after.get('text_snippets', []))
-        text_changes = len(before_text.symmetric_difference(after_text))
-    
-        if text_changes > 5:  # More than 5 text snippets changed
-            print(f"🎯 Significant text changes: {text_changes} snippets different")
-            return True
-    
-        print("⚠️ No significant page changes detected")
+        logger.info("⚠️ No significant page changes detected")
         return False
     
 
     async def _try_alternative_tap_methods(self, element_id: str, original_fingerprint: Dict) -> Dict[str, Any]:
         """Try alternative tap methods - completely generic."""
     
-        print("🔄 Trying alternative tap methods...")
+        logger.info("🔄 Trying alternative tap methods...")
     
-        # Method 1: JavaScript click (for web contexts)
+        # (name, method, poll for the page change?) in the order they are tried;
+        # JavaScript click only applies to web contexts
+        methods = []
         if await self._is_web_context():
-            print("🌐 Trying JavaScript-based alternatives...")
-            js_result = await self._try_javascript_alternatives(element_id)
-            if js_result.get('status') == 'success':
-                # Verify it worked
-                new_fingerprint = await self._get_page_fingerprint()
-                if self._did_page_change(original_fingerprint, new_fingerprint):
-                    return js_result
-    
-        # Method 2: Double tap
-        print("🔄 Trying double tap...")
-        try:
-            await self.call_tool("appium_tap_element", {"element_id": element_id})
-            await asyncio.sleep(0.5)
-            result = await self.call_tool("appium_tap_element", {"element_id": element_id})
-            parsed_result = self.parse_tool_result(result)
-        
-            if parsed_result.get('status') == 'success':
-                await asyncio.sleep(2)
-                new_fingerprint = await self._get_page_fingerprint()
-                if self._did_page_change(original_fingerprint, new_fingerprint):
-                    return {"status": "success", "message": "Double tap successful"}
-        except Exception as e:
-            print(f"⚠️ Double tap failed: {e}")
-    
-        # Method 3: Scroll and tap
-        print("🔄 Trying scroll and tap...")
-        try:
-            await self.call_tool("appium_scroll", {"direction": "up"})
-            await asyncio.sleep(1)
-            result = await self.call_tool("appium_tap_element", {"element_id": element_id})
-            parsed_result = self.parse_tool_result(result)
-        
-            if parsed_result.get('status') == 'success':
-                await asyncio.sleep(2)
-                new_fingerprint = await self._get_page_fingerprint()
-                if self._did_page_change(original_fingerprint, new_fingerprint):
-                    return {"status": "success", "message": "Scroll and tap successful"}
-        except Exception as e:
-            print(f"⚠️ Scroll and tap failed: {e}")
+            methods.append(("JavaScript click", self._try_javascript_alternatives, False))
+        methods += [
+            ("double tap", self._double_tap, True),
+            ("scroll and tap", self._scroll_and_tap, True),
+            ("alternative elements", self._find_and_tap_alternatives, False),
+        ]
     
-        # Method 4: Try finding similar elements
-        print("🔄 Trying to find alternative elements...")
-        try:
-            alt_result = await self._find_and_tap_alternatives(element_id)
-            if alt_result.get('status') == 'success':
-                new_fingerprint = await self._get_page_fingerprint()
-                if self._did_page_change(original_fingerprint, new_fingerprint):
-                    return alt_result
-        except Exception as e:
-            print(f"⚠️ Alternative element search failed: {e}")
+        for name, method, poll in methods:
+            logger.info("🔄 Trying %s...", name)
+            try:
+                method_result = await method(element_id)
+                if method_result.get('status') == 'success':
+                    # Verify it worked
+                    if poll:
+                        new_fingerprint = await self._wait_for_page_change(original_fingerprint)
+                    else:
+                        new_fingerprint = await self._get_page_fingerprint()
+                    if self._did_page_change(original_fingerprint, new_fingerprint):
+                        return method_result
+            except Exception as e:
+                logger.warning("⚠️ %s failed: %s", name.capitalize(), e)
     
         return {"status": "error", "message": "All alternative tap methods failed"}
     
+    async def _double_tap(self, element_id: str) -> Dict[str, Any]:
+        """Tap the element twice, half a second apart."""
+        await self.call_tool("appium_tap_element", {"element_id": element_id})
+        await asyncio.sleep(0.5)
+        result = await self.call_tool("appium_tap_element", {"element_id": element_id})
+        parsed_result = self.parse_tool_result(result)
+        if parsed_result.get('status') == 'success':
+            return {"status": "success", "message": "Double tap successful"}
+        return parsed_result
+    
+    async def _scroll_and_tap(self, element_id: str) -> Dict[str, Any]:
+        """Scroll up, let the screen settle, then tap the element again."""
+        await self.call_tool("appium_scroll", {"direction": "up"})
+        await asyncio.sleep(1)
+        result = await self.call_tool("appium_tap_element", {"element_id": element_id})
+        parsed_result = self.parse_tool_result(result)
+        if parsed_result.get('status') == 'success':
+            return {"status": "success", "message": "Scroll and tap successful"}
+        return parsed_result
+    
     async def _try_javascript_alternatives(self, element_id: str) -> Dict[str, Any]:
         """Try JavaScript alternatives - uses the generic method we created earlier."""
         return await self._try_javascript_click(element_id)
@@ -1448,26 +1871,17 @@ class EnhancedMCPClient:
     
         if element_info.get("text"):
             # Try to find other elements with same text
-            text = element_info["text"]
-            alternative_strategies = [
-                ("xpath", f"//*[text()='{text}']"),
-                ("xpath", f"//*[contains(text(), '{text}')]"),
-                ("xpath", f"//button[text()='{text}']"),
-                ("xpath", f"//a[text()='{text}']"),
-            ]
+            text_literal = xpath_literal(element_info["text"])
+            alternative_strategies = [("xpath", xpath.format(text_literal)) for xpath in ALTERNATIVE_TEXT_XPATHS]
         
+            # Look up and tap one alternative at a time, so the remaining finds are skipped once a tap works
             for strategy, value in alternative_strategies:
                 try:
-                    result = await self.call_tool("appium_find_element", {
-                        "strategy": strategy,
-                        "value": value
-                    })
-                    parsed_result = self.parse_tool_result(result)
-                
+                    parsed_result = await self._find_cached(strategy, value)
                     if parsed_result.get('status') == 'success':
                         alt_element_id = parsed_result.get('element_id')
                         if alt_element_id != element_id:  # Different element
-                            print(f"🔄 Trying alternative element: {alt_element_id}")
+                            logger.debug("🔄 Trying alternative element: %s", alt_element_id)
                             tap_result = await self.call_tool("appium_tap_element", {
                                 "element_id": alt_element_id
                             })
@@ -1475,7 +1889,8 @@ class EnhancedMCPClient:
                         
                             if tap_parsed.get('status') == 'success':
                                 return {"status": "success", "message": f"Alternative element tap successful via {strategy}"}
-                except:
+                except Exception as e:
+                    logger.debug("Alternative strategy %s failed: %s", strategy, e)
                     continue
     
         return {"status": "error", "message": "No alternative elements found"}
@@ -5,6 +5,7 @@
 import argparse
 import asyncio
 import json
+import logging
 import re
 import subprocess
 import threading
@@ -18,18 +19,18 @@ from llm_clients.claude_client import run_prompt as run_with_claude
 from enhanced_mcp_client import EnhancedMCPClient
 
 # Start the MCP server subprocess (your existing server)
+# Binary, buffered pipes: the client writes/reads JSON-RPC bytes directly (no text-mode transcoding)
 mcp_proc = subprocess.Popen(
     ["python", "src/mcp_server.py"],
     stdin=subprocess.PIPE,
     stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE,
-    text=True,
-    bufsize=1
+    stderr=subprocess.PIPE
 )
 
 # Log MCP server stderr asynchronously
 def log_stderr(stream):
-    for line in stream:
+    for raw_line in stream:
+        line = raw_line.decode("utf-8", errors="replace")
         if line.strip():
             print("🔴 MCP Server STDERR:", line.strip())
 
@@ -50,6 +51,15 @@ parser.add_argument("--device", help="Override device name")
 
 args = parser.parse_args()
 
+# Route the MCP client's log records to stdout (--debug also shows the raw JSON-RPC traffic).
+# Only the client's logger is configured, so third-party libraries stay at the root default.
+client_log_handler = logging.StreamHandler(sys.stdout)
+client_log_handler.setFormatter(logging.Formatter("%(message)s"))
+client_logger = logging.getLogger("enhanced_mcp_client")
+client_logger.addHandler(client_log_handler)
+client_logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+client_logger.propagate = False
+
 # Generic tool instruction template - works for any app
 instruction = """You are a universal mobile automation assistant that can interact with ANY mobile app using Appium and GENERATE COMPLETE APPIUM JAVA PROJECTS with Maven + TestNG
 
@@ -414,6 +424,7 @@ def is_new_app_command(prompt):
 async def execute_tool_calls(json_blocks):
     """Execute tool calls with your existing MCP server."""
     
+    client = None
     try:
         # Create enhanced MCP client
         client = EnhancedMCPClient(mcp_proc)
@@ -488,7 +499,7 @@ async def execute_tool_calls(json_blocks):
                     if element_id:
                         print(f"✅ Found element: {element_id}")
                         # Store for potential use in next steps
-                        client.element_store[f"step_{i}"] = element_id
+                        client.remember_element(f"step_{i}", element_id)
                     else:
                         print(f"❌ Element not found: {result}")
                         
@@ -498,7 +509,7 @@ async def execute_tool_calls(json_blocks):
                         
                         if element_id:
                             print(f"✅ Found element after scrolling: {element_id}")
-                            client.element_store[f"step_{i}"] = element_id
+                            client.remember_element(f"step_{i}", element_id)
                         else:
                             print(f"❌ Element not found even after scrolling: {scroll_result}")
                         
@@ -850,6 +861,10 @@ async def execute_tool_calls(json_blocks):
         print(f"❌ Error in tool execution: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # Release this event loop's pipe transports; mcp_proc is reused by the next asyncio.run()
+        if client is not None:
+            await client.aclose()
 
 # NEW FUNCTION: Handle Gemini 2.0.5 Pro array format
 def extract_array_format(response_text):
@@ -234,6 +234,8 @@ def find_element(strategy: str, value: str) -> dict:
             element = driver.find_element("class name", value)
         elif strategy == "accessibility_id":
             element = driver.find_element("accessibility id", value)
+        elif strategy == "css_selector":
+            element = driver.find_element("css selector", value)
         else:
             return {
                 "status": "error",
@@ -415,6 +417,8 @@ def input_text(element_id: str = None, text: str = "", strategy: str = None, val
                 element = driver.find_element("class name", value)
             elif strategy == "accessibility_id":
                 element = driver.find_element("accessibility id", value)
+            elif strategy == "css_selector":
+                element = driver.find_element("css selector", value)
             else:
                 return {
                     "status": "error",
@@ -523,6 +527,51 @@ def get_text(element_id: str) -> dict:
             "message": f"Failed to retrieve text: {str(e)}"
         }
     
+def get_contexts() -> dict:
+    """
+    List the available automation contexts and the current one (NATIVE_APP, WEBVIEW_*, CHROMIUM).
+    """
+    try:
+        driver = active_session.get("driver")
+        if not driver:
+            return {"status": "error", "message": "No active session"}
+
+        return {
+            "status": "success",
+            "contexts": driver.contexts,
+            "current_context": driver.current_context
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_type": type(e).__name__,
+            "message": f"Failed to get contexts: {str(e)}"
+        }
+    
+def update_settings(settings: dict) -> dict:
+    """
+    Apply Appium driver settings (e.g. pageSourceExcludedAttributes) to the current session.
+    """
+    try:
+        driver = active_session.get("driver")
+        if not driver:
+            return {"status": "error", "message": "No active session"}
+
+        driver.update_settings(settings)
+        return {
+            "status": "success",
+            "settings": settings,
+            "message": f"Updated settings: {', '.join(settings)}"
+        }
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_type": type(e).__name__,
+            "message": f"Failed to update settings: {str(e)}"
+        }
+    
 def get_latest_ios_simulator_version() -> str:
     import subprocess
     import re
@@ -21,6 +21,8 @@ from appium_controller import (
     get_page_source,
     scroll,
     get_text,
+    get_contexts,
+    update_settings,
     extract_selectors_from_page_source,
     take_screenshot,
     quit_session,
@@ -130,8 +132,8 @@ async def handle_list_tools() -> list[Tool]:
                 "properties": {
                     "strategy": {
                         "type": "string",
-                        "description": "Locator strategy: 'id' for unique IDs, 'xpath' for complex paths, 'class_name' for UI classes, 'accessibility_id' for accessibility labels",
-                        "enum": ["id", "xpath", "class_name", "accessibility_id"]
+                        "description": "Locator strategy: 'id' for unique IDs, 'xpath' for complex paths, 'class_name' for UI classes, 'accessibility_id' for accessibility labels, 'css_selector' for web contexts",
+                        "enum": ["id", "xpath", "class_name", "accessibility_id", "css_selector"]
                     },
                     "value": {
                         "type": "string",
@@ -172,7 +174,7 @@ async def handle_list_tools() -> list[Tool]:
                     },
                 "strategy": {
                 "type": "string",
-                "enum": ["id", "xpath", "class_name", "accessibility_id"],
+                "enum": ["id", "xpath", "class_name", "accessibility_id", "css_selector"],
                 "description": "Optional: Locator strategy if no element_id"
                      },
                 "value": {
@@ -197,6 +199,29 @@ async def handle_list_tools() -> list[Tool]:
                 "required": ["element_id"]
             }
         ),
+        Tool(
+            name="appium_update_settings",
+            description="Update Appium driver settings for the current session (e.g. pageSourceExcludedAttributes)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "settings": {
+                        "type": "object",
+                        "description": "Settings to apply, e.g. {\"pageSourceExcludedAttributes\": \"visible\"}"
+                    }
+                },
+                "required": ["settings"]
+            }
+        ),
+        Tool(
+            name="appium_get_contexts",
+            description="List the available contexts (NATIVE_APP, WEBVIEW_*) and the current context",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+                "required": []
+            }
+        ),
         Tool(
             name="appium_scroll",
             description="Scroll the screen in the specified direction (down or up)",
@@ -482,6 +507,15 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
         result = get_text(element_id)
         return [TextContent(type="text", text=json.dumps(result, indent=2))]
     
+    elif name == "appium_update_settings":
+        settings = arguments.get("settings", {})
+        result = update_settings(settings)
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+    
+    elif name == "appium_get_contexts":
+        result = get_contexts()
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+    
     elif name == "appium_take_screenshot":
         result = take_screenshot(**arguments)
         return [TextContent(type="text", text=json.dumps(result, indent=2))]
@@ -0,0 +1,168 @@
+"""Tests for the EnhancedMCPClient JSON-RPC transport and page-source element matching."""
+
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+import enhanced_mcp_client
+from enhanced_mcp_client import EnhancedMCPClient
+
+# How long a request may take before the test treats it as hung
+REQUEST_TIMEOUT = 5
+
+
+class PipeProcess:
+    """Stand-in for the MCP server subprocess: the test holds the server ends of both pipes."""
+
+    def __init__(self):
+        stdout_read, self.server_stdout = os.pipe()
+        self.server_stdin, stdin_write = os.pipe()
+        self.stdout = os.fdopen(stdout_read, "rb", buffering=0)
+        self.stdin = os.fdopen(stdin_write, "wb", buffering=0)
+
+    def close_server_stdout(self):
+        if self.server_stdout is not None:
+            os.close(self.server_stdout)
+            self.server_stdout = None
+
+    def close(self):
+        self.close_server_stdout()
+        os.close(self.server_stdin)
+        self.stdout.close()
+        self.stdin.close()
+
+
+class ReaderExitTest(unittest.IsolatedAsyncioTestCase):
+    """Once the response reader stops, requests must fail instead of waiting forever."""
+
+    async def asyncSetUp(self):
+        self.process = PipeProcess()
+        self.client = EnhancedMCPClient(self.process)
+        await self.client._ensure_transport()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        self.process.close()
+
+    async def test_server_eof_fails_pending_and_later_requests(self):
+        pending = asyncio.create_task(self.client.send_request("tools/list"))
+        await asyncio.sleep(0.05)  # let the request reach _pending
+        self.process.close_server_stdout()
+
+        with self.assertRaisesRegex(Exception, "No response from MCP server"):
+            await asyncio.wait_for(pending, REQUEST_TIMEOUT)
+        with self.assertRaisesRegex(Exception, "MCP transport is closed"):
+            await asyncio.wait_for(self.client.send_request("tools/list"), REQUEST_TIMEOUT)
+        with self.assertRaisesRegex(Exception, "MCP transport is closed"):
+            await asyncio.wait_for(self.client.call_tool("appium_get_page_source", {"full": False}), REQUEST_TIMEOUT)
+
+    async def test_over_limit_line_fails_later_requests(self):
+        await self.client.aclose()
+        with mock.patch.object(enhanced_mcp_client, "MCP_STREAM_LIMIT", 64):
+            await self.client._ensure_transport()
+        os.write(self.process.server_stdout, b"x" * 256 + b"\n")
+        await asyncio.sleep(0.05)  # let the reader hit the limit and stop
+
+        with self.assertRaisesRegex(Exception, "MCP transport is closed: MCP transport error"):
+            await asyncio.wait_for(self.client.send_request("tools/list"), REQUEST_TIMEOUT)
+
+    async def test_aclose_reopens_transport(self):
+        self.process.close_server_stdout()
+        await asyncio.sleep(0.05)  # let the reader see EOF
+        await self.client.aclose()
+
+        # A fresh transport is attached; with the server gone it fails fast again rather than hanging
+        with self.assertRaisesRegex(Exception, "No response from MCP server|MCP transport is closed"):
+            await asyncio.wait_for(self.client.send_request("tools/list"), REQUEST_TIMEOUT)
+
+
+# Nested iOS page: container tags without text are skipped, and the Cell's own text
+# precedes its child, so extraction order is the document (pre-order) order
+NESTED_PAGE = (
+    '<hierarchy><XCUIElementTypeWindow>'
+    '<XCUIElementTypeButton name="Login" label="Log In"/>'
+    '<XCUIElementTypeOther>'
+    '<XCUIElementTypeStaticText label="Email"/>'
+    '<XCUIElementTypeOther/>'
+    '<XCUIElementTypeCell>Row<XCUIElementTypeStaticText value="Password"/></XCUIElementTypeCell>'
+    '</XCUIElementTypeOther>'
+    '</XCUIElementTypeWindow>'
+    '<XCUIElementTypeButton name="Forgot"/>'
+    '</hierarchy>'
+)
+NESTED_PAGE_ELEMENTS = [
+    {"tag": "XCUIElementTypeButton", "accessibility_id": "Login", "label": "Log In", "text": "Log In",
+     "xpath": "//XCUIElementTypeButton", "enabled": True},
+    {"tag": "XCUIElementTypeStaticText", "label": "Email", "text": "Email",
+     "xpath": "//XCUIElementTypeStaticText", "enabled": True},
+    {"tag": "XCUIElementTypeCell", "text": "Row", "xpath": "//XCUIElementTypeCell", "enabled": True},
+    {"tag": "XCUIElementTypeStaticText", "text": "Password", "xpath": "//XCUIElementTypeStaticText", "enabled": True},
+    {"tag": "XCUIElementTypeButton", "accessibility_id": "Forgot", "xpath": "//XCUIElementTypeButton", "enabled": True},
+]
+
+
+class CandidateMatchTest(unittest.TestCase):
+    """_find_element_candidates must match like a per-element casefolded `in` test."""
+
+    def setUp(self):
+        self.client = EnhancedMCPClient(mock.Mock())
+        self.elements = [
+            {"text": "Sign In", "accessibility_id": "login_button"},
+            {"label": "Forgot password?"},
+            {"text": "STRASSE", "label": "Street"},
+            {"accessibility_id": "sign in"},
+            {"text": "Sign in later", "label": "Sign In"},
+        ]
+
+    def assert_candidates(self, target, expected):
+        candidates = self.client._find_element_candidates(self.elements, target)
+        self.assertEqual([(match, self.elements.index(element)) for match, element in candidates], expected)
+
+    def test_exact_match(self):
+        # Exact on any field, after casefolding and stripping both sides
+        self.assert_candidates("  sign in ", [("exact", 0), ("exact", 3), ("exact", 4)])
+
+    def test_substring_match(self):
+        self.assert_candidates("password", [("contains", 1)])
+        self.assert_candidates("in", [("contains", 0), ("contains", 3), ("contains", 4)])
+
+    def test_casefold_match(self):
+        # casefold, unlike lower, maps the German sharp s to "ss"
+        self.assert_candidates("Straße", [("exact", 2)])
+        self.assert_candidates("LOGIN_", [("contains", 0)])
+
+    def test_no_match_and_field_boundaries(self):
+        self.assert_candidates("missing", [])
+        # A match must not span two fields of one element ("sign in" + "login_button")
+        self.assert_candidates("inlogin", [])
+
+    def test_empty_target_matches_every_element(self):
+        # Every element has at least one unset field, which is "" and so an exact match
+        self.assert_candidates("", [("exact", position) for position in range(len(self.elements))])
+
+
+class ExtractSelectorsTest(unittest.IsolatedAsyncioTestCase):
+    """enhanced_extract_selectors must stop at max_elements without changing which elements come first."""
+
+    async def asyncSetUp(self):
+        self.client = EnhancedMCPClient(mock.Mock())
+        self.client._cached_page_source = mock.AsyncMock(
+            return_value={"status": "success", "page_source": NESTED_PAGE})
+
+    async def test_extracts_nested_elements_in_document_order(self):
+        result = await self.client.enhanced_extract_selectors(max_elements=50)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["elements"], NESTED_PAGE_ELEMENTS)
+        self.assertEqual(result["total_found"], len(NESTED_PAGE_ELEMENTS))
+
+    async def test_max_elements_truncates_to_prefix(self):
+        for max_elements in range(1, len(NESTED_PAGE_ELEMENTS) + 1):
+            with self.subTest(max_elements=max_elements):
+                result = await self.client.enhanced_extract_selectors(max_elements=max_elements)
+                self.assertEqual(result["elements"], NESTED_PAGE_ELEMENTS[:max_elements])
+                self.assertEqual(result["total_found"], max_elements)
+
+
+if __name__ == "__main__":
+    unittest.main()